@@ -1,9 +1,9 @@
 '''
 Initialization for a single model grid cell.
 '''
-import math
-import operator
-from dataclasses import dataclass
+from itertools import accumulate
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from typing import TypeAlias, Self
 
 import src.live as bio
@@ -22,13 +22,20 @@ Depths: TypeAlias = tuple[float, float]
 Stocks: TypeAlias = tuple[bio.Biomass, sed.Sediments]
 Inactives: TypeAlias = tuple[Inactive, Inactive, Inactive]
 
-@dataclass(frozen=True)
+@dataclass(slots=True)
 class Layer:
     '''
     A single timestep layer in a model grid cell.
+
+    Layers are immutable by convention (step_forward returns a new layer) but are not frozen,
+    so construction uses plain attribute assignment. As a mutable class, layers are not hashable.
     '''
-    depths: Depths
-    stocks: Stocks
+    top: float
+    '''Top depth of the layer [in cm].'''
+    bottom: float
+    '''Bottom depth of the layer [in cm].'''
+    biomass: bio.Biomass
+    sediments: sed.Sediments
 
     # def step_forward(self, deposition: float, biomass_at_surface: float, yrs: float,
     #                  is_top_layer: bool = False) -> Self:
@@ -77,6 +84,7 @@ class Layer:
         4. Sediments: erosion (-) (remove eroded sediment less eroded biomass [from step 1]). 
         5. Sediments: add deposition (+) if is_top_layer is True, otherwise ignore this step.
         6. Adjust depth of layer from turnover(+), erosion(-), transfers out of system (-).
+           Losses move the top down, gains move the top up to 0 and then the bottom down.
         
         Note:
             + represents a net gain for the layer.
@@ -86,52 +94,60 @@ class Layer:
         Returns:
             Layer: layer with updated layer depths and sediments stock (NO updates to biomass).
         '''
-        non_negative_attribute('yrs', yrs)
-        non_negative_attribute('biomass_at_surface', biomass_at_surface)
-        if deposition < 0 and self.depth < -deposition:
-            # this condition should be delt with in the cell.step_forward function.
-            raise ValueError(f'erosion {deposition} > layer depth {self.depth}')
+        if __debug__: # Cell.step_forward validates inputs, skipped with python -O.
+            non_negative_attribute('yrs', yrs)
+            non_negative_attribute('biomass_at_surface', biomass_at_surface)
+            if deposition < 0 and self.depth < -deposition:
+                # this condition should be delt with in the cell.step_forward function.
+                raise ValueError(f'erosion {deposition} > layer depth {self.depth}')
+        live = self.biomass
         # 1. Biomass - transfers: (a) turnover (+) (b) burial (~) or (c) erosion (-).
-        turnover, burial, erosion = self.stocks[0].transfers(deposition, self.depths, yrs)
+        bio_inflow, buried, eroded = live.transfers(deposition, self.depths, yrs)
         # 2. Sediments transfers: (a) decomposition (-) and (b) ash uptake (-).
         # 3. Sediments update: add turnover (+) and burial transfers (~) from biomass.
         # 4. Sediments transfers: erosion (-) of sediments (after adjustment for biomass erosion).
-        bio_inflow = tuple(map(operator.add, turnover, burial))
-        bio_delta = self.stocks[0].fxs.converter(-sum(erosion), bio.Tag.BIOMASS, Measurement.LENGTH)
-        sediments = self.stocks[1].transfers(yrs).update(bio_inflow).erosion(-deposition-bio_delta)
+        bio_delta = live.fxs.converter(-eroded, bio.Tag.BIOMASS, Measurement.LENGTH)
         # 5. Sediments update: add deposition (+) if is_top_layer, otherwise ignore this step.
+        deposited = None
         if is_top_layer and deposition > 0: # if deposition <= 0 this is pointless.
-            sediments = sediments.update(self.stocks[1].tools.deposition(deposition))
+            # deposition is a length [in cm], split into stocks as in Cell.top_layer.
+            stocks = sed.factory(deposition, self.sediments.fxs, Measurement.LENGTH)
+            deposited = (stocks.labile.weight, stocks.refractory.weight, stocks.inorganic.weight)
+        sediments = self.sediments.step(yrs, bio_inflow, -deposition+bio_delta, deposited)
         # 6. Adjust depth of layer from turnover(+), erosion(-), transfers out of system (-).
-        sed_delta = sediments.length - self.stocks[1].length # loss will be negative.
-        new_depths = (self.depths[0] + bio_delta + sed_delta, self.depths[1])
+        # deltas are negative for a loss, which moves the top of the layer down towards its
+        # (fixed) bottom. A layer can not lose more than its depth. A gain that would move
+        # the top above 0 moves the bottom down instead, so layer depths stay non-negative.
+        sed_delta = sediments.length - self.sediments.length
+        new_top, new_bottom = min(self.top - bio_delta - sed_delta, self.bottom), self.bottom
+        if new_top < 0:
+            new_top, new_bottom = 0.0, self.bottom - new_top
         # 7. Remake biomass stock with new biomass at surface and new depths.
-        biomass = self.stocks[0].remake(biomass_at_surface, (new_depths[1] - new_depths[0]))
-        ngrowth = self.stocks[0].val - (math.fsum(erosion) + math.fsum(burial)) - biomass.val
+        biomass = live.remake(biomass_at_surface, new_bottom - new_top)
+        ngrowth = live.val - (eroded + buried) - biomass.val
         if ngrowth > 0:
-            removal = self.stocks[0].fxs.negative_growth(ngrowth)
+            removal = live.fxs.negative_growth(ngrowth)
             sediments = sediments.update(removal)
-        return Layer(new_depths, (biomass, sediments))
+        return Layer(new_top, new_bottom, biomass, sediments)
 
     def __eq__(self, other: Self) -> bool:
         '''Layer equality.'''
-        isequal = True if self.depths == other.depths else False
-        for i, stock in enumerate(self.stocks):
-            isequal = isequal if stock.__eq__(other.stocks[i]) else False
-        return isequal
+        return (self.top == other.top and self.bottom == other.bottom
+                and self.biomass == other.biomass
+                and self.sediments == other.sediments)
 
     @property
-    def top(self) -> float:
-        '''Returns the top depth of the layer [in cm].'''
-        return self.depths[0]
+    def stocks(self) -> Stocks:
+        '''Returns the (biomass, sediments) stocks in the layer.'''
+        return (self.biomass, self.sediments)
     @property
-    def bottom(self) -> float:
-        '''Returns the bottom depth of the layer [in cm].'''
-        return self.depths[1]
+    def depths(self) -> Depths:
+        '''Returns the (top, bottom) depths of the layer [in cm].'''
+        return (self.top, self.bottom)
     @property
     def depth(self) -> float:
         '''Returns the depth of the layer [in cm].'''
-        return self.depths[1] - self.depths[0]
+        return self.bottom - self.top
     @property
     def headers(self) -> tuple[str, ...]:
         '''Writes data headers for logging.'''
@@ -140,18 +156,18 @@ class Layer:
     def write_data(self) -> tuple[float,...]:
         '''Writes data for logging.'''
         return (self.top, self.bottom, self.depth,
-                self.stocks[0].length, self.stocks[1].labile.length,
-                self.stocks[1].refractory.length, self.stocks[1].inorganic.length)
+                self.biomass.length, self.sediments.labile.length,
+                self.sediments.refractory.length, self.sediments.inorganic.length)
 
 def enumerate_backwards(data: list[any]|tuple[any,...]) -> tuple[int, any]:
     '''
     Enumerates a list or tuple backwards, or in case of cell from surface layer to bottom layer.
     '''
     n = len(data) - 1
-    for i in range(len(data)-1, -1, -1):
+    for i in range(n, -1, -1):
         yield (n - i, data[i])
 
-@dataclass
+@dataclass(slots=True)
 class Cell:
     '''
     A model grid cell layered sediment core.
@@ -164,21 +180,24 @@ class Cell:
     '''List of layers in the cell.'''
     tools: tuple[bio.PartialTools, sed.Tools]
     '''Utilities for managing biomass and sediment stocks.'''
+    _depths: tuple[tuple[Layer, ...], tuple[float, ...]] | None = field(
+        default=None, init=False, repr=False, compare=False)
+    '''Layers and their cumulative depths, recomputed on demand if the layers change.'''
 
     def depth(self) -> float:
         '''Returns the depth of the cell [in cm].'''
-        return self.layers[-1].depths[1]
+        return self.layers[-1].bottom
 
     def depth_of_layer(self, index: int) -> float:
         '''Returns the depth of the top of the ith layer (from top of cell) [in cm].'''
         if index < 0 or index >= len(self.layers):
             raise IndexError(f'index {index} out of range')
-        i: int = 0
-        depth: float = 0
-        while i < index:
-            depth += self.layers[i].depth
-            i += 1
-        return depth
+        # layers can be appended, replaced or reassigned, so the cache is keyed on the layers.
+        layers = tuple(self.layers)
+        if self._depths is None or self._depths[0] != layers:
+            depths = tuple(accumulate((layer.depth for layer in layers), initial=0.0))
+            self._depths = (layers, depths)
+        return self._depths[1][index]
 
     def step_forward(self, dep: float, top: float, yrs: float, sub_steps: int = 1) -> Self:
         '''
@@ -191,7 +210,7 @@ class Cell:
             sub_steps (int): number of substeps to take. 1 by default.
             
         Returns:
-            Cell: updated cell.
+            Cell: the updated cell (self, updated in place).
             
         Raises:
             ValueError: if top < 0, yrs < 0, or substeps < 1.
@@ -203,9 +222,11 @@ class Cell:
         positive_attribute('sub_steps', sub_steps)
         layers = self.layers
         ddep, dtop, dt = dep/sub_steps, (top - self.top) / sub_steps, yrs/sub_steps # d_<var>/d_t
+        substep, top0 = self.__substep, self.top
         for i in range(sub_steps):
-            layers = self.__substep(ddep, self.top + dtop * (i + 1), dt, i, layers)
-        return Cell(top, self.elevation, layers, self.tools)
+            layers = substep(ddep, top0 + dtop * (i + 1), dt, i, layers)
+        self.top = top
+        return self
         # Update top elevation.
         # --Interate downwards (calling Layer.step_forward).
         # Pass new bottom layer depth down to next layer (as top).
@@ -248,17 +269,22 @@ class Cell:
         # (for the top of the first layer in the loop) is below the deposition.
         depth = 0 if deposition < 0 or i != 0 else deposition
         # 3. Loop from top to bottom layer = last to first item in list.
-        for j, layer in enumerate_backwards(layers): # top to bottom
+        n = len(layers) - 1
+        for j in range(n, -1, -1): # top to bottom
+            layer = layers[j]
+            thickness = layer.depth
             # 4. biomass at surface of layer
             dtop = top if depth == 0 else f(depth)
             # 5. Erosion versus deposition and burial tracks.
-            is_top_layer = i != 0 and j==0 # false if first pass or not top layer.
-            ddep = max(deposition, -layer.depth) if deposition < 0 else deposition
+            is_top_layer = i != 0 and j == n # false if first pass or not top layer.
+            if deposition < 0: # erosion is limited to the depth of the layer.
+                ddep = max(deposition, -thickness)
+                deposition -= ddep # left over erosion.
+            else:
+                ddep = deposition
             # 6. Update layer.
             layers[j] = layer.step_forward(ddep, dtop, years, is_top_layer)
-            derosion = ddep if deposition < 0 else 0
-            deposition -= derosion # left over erosion.
-            depth += layer.depth
+            depth += thickness
         if i == 0: # first pass
             layers.append(self.top_layer(deposition, top))
         return layers
@@ -267,10 +293,9 @@ class Cell:
         '''
         Writes layer data in format compatible with pandas DataFrame.
         '''
-        data = []
-        for i, layer in enumerate_backwards(self.layers):
-            data.append(layer.write_data)
-        return (data, self.layers[0].headers)
+        layers = self.layers
+        data = [layers[i].write_data for i in range(len(layers) - 1, -1, -1)]
+        return (data, layers[0].headers)
     # def __substep(self, deposition: float, top: float, yrs: float,
     #               is_first_pass: bool) -> list[Layer]:
     #     '''
@@ -339,21 +364,36 @@ class Cell:
         '''
         Creates a new layer, with biomass.
         '''
-        return Layer((0, dep),
-                     (bio.factory(top, (0, dep), self.tools[0]),
-                      sed.factory(dep, self.tools[1], Measurement.LENGTH)))
+        return Layer(0, dep,
+                     bio.factory(top, (0, dep), self.tools[0]),
+                     sed.factory(dep, self.tools[1], Measurement.LENGTH))
+
+@lru_cache(maxsize=None)
+def _shared_tools(constants: Constants) -> tuple[bio.PartialTools, sed.Tools]:
+    '''
+    Returns biomass and sediment tools, cached by constants.
+    '''
+    return (bio.PartialTools(constants), sed.Tools(constants))
+
+def cell_tools(constants: Constants) -> tuple[bio.PartialTools, sed.Tools]:
+    '''
+    Returns biomass and sediment tools for a model grid cell.
+
+    Note: tools do not depend on the cell id, so cells with otherwise equal constants share tools.
+    '''
+    return _shared_tools(replace(constants, id=0))
 
 def initial_layer(constants: Constants) -> Layer:
     '''
     Returns an initial layer for a model grid cell.
     '''
-    live = bio.factory(constants.ro, (0, constants.depth), bio.PartialTools(constants))
-    sediments = sed.factory(constants.depth - live.length, sed.Tools(constants), Measurement.LENGTH)
-    return Layer((0, constants.depth), (live, sediments))
+    partial_tools, sed_tools = cell_tools(constants)
+    live = bio.factory(constants.ro, (0, constants.depth), partial_tools)
+    sediments = sed.factory(constants.depth - live.length, sed_tools, Measurement.LENGTH)
+    return Layer(0, constants.depth, live, sediments)
 
 def factory(constants: Constants) -> Cell:
     '''
     Returns a model grid cell.
     '''
-    return Cell(constants.ro, constants.du, [initial_layer(constants)],
-                (bio.PartialTools(constants), sed.Tools(constants)))
+    return Cell(constants.ro, constants.du, [initial_layer(constants)], cell_tools(constants))
@@ -4,15 +4,19 @@ The model requires the parameterization of a large number of constants.
 This module reads a constants.toml files and generates an immutable Constants dataclass.
 '''
 
+import os
 import tomllib
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+import numpy as np
 
 MORRIS_CONSTANTS: str = str(Path(__file__).parent.parent.
                             joinpath('data').joinpath('morris_constants.toml'))
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ImportFileConstants:
     '''
     Model constants from import file. Uses Morris & Bowden's (1986) notation.
@@ -74,68 +78,54 @@ class ImportFileConstants:
         >1: net influx.
     '''
 
+    # derived properties, computed in __post_init__
+    depth: tuple[float, ...] = field(init=False, repr=False, compare=False)
+    '''Depth of the soil layer [in cm].'''
+    fi: tuple[float, ...] = field(init=False, repr=False, compare=False)
+    '''Fraction of sediment that is inorganic [dmls].'''
+    fl: tuple[float, ...] = field(init=False, repr=False, compare=False)
+    '''Fraction of sediment that is labile [dmls].'''
+
     def __post_init__(self):
         #pylint: disable=line-too-long
-        for i, id_ in enumerate(self.ids):
-            if self.ids.count(id_) > 1:
-                raise ValueError(f'The id: {id_} is not unique.')
-            if self.surface_areas[i] <= 0:
-                raise ValueError(f'At id: {id_}, sa: {self.surface_areas[i]} (surface area [in cm2]) must be greater than 0.')
-            if self.du[i] <= self.db[i]:
-                raise ValueError(f'At id: {id_}, du: {self.du[i]} (top elevation [in cm]) must be greater than db: {self.db[i]} (bottom elevation [in cm]).')
-            if self.bo[i] <= 0:
-                raise ValueError(f'At id: {id_}, bo: {self.bo[i]} (bulk density of organic matter [in g/cm3]) must be greater than 0.')
-            if self.bi[i] <= 0:
-                raise ValueError(f'At id: {id_}, bi: {self.bi[i]} (bulk density of inorganic matter [in g/cm3]) must be greater than 0.')
-            if self.fo[i] < 0 or self.fo[i] > 1:
-                raise ValueError(f'At id: {id_}, fo: {self.fo[i]} (fraction of sediment that is organic [dmls]) must be greater than 0 and less than 1.')
-            if self.fi[i] < 0 or self.fi[i] > 1:
-                raise ValueError(f'At id: {id_}, fi: {self.fi[i]} (fraction of sediment that is inorganic [dmls]) must be greater than 0 and less than 1.')
-            if self.fo[i] + self.fi[i] != 1:
-                raise ValueError(f'At id: {id_}, fo: {self.fo[i]} (fraction of sediment that is organic [dmls]) plus fi: {self.fi[i]} (fraction of sediment that is inorganic [dmls]) must equal 1.')
-            if self.k[i] <= 0:
-                raise ValueError(f'At id: {id_}, k: {self.k[i]} (specific decay constant for labile organic material [in 1/yr]) must be greater than 0.')
-            if self.fc[i] < 0 or self.fc[i] > 1:
-                raise ValueError(f'At id: {id_}, fc: {self.fc[i]} (fraction of sediment that is refractory [dmls]) must be greater than 0 and less than 1.')
-            if self.fc[i] + self.fl[i] != 1:
-                raise ValueError(f'At id: {id_}, fc: {self.fc[i]} (fraction of sediment that is refractory [dmls]) plus fl: {self.fl[i]} (fraction of sediment that is labile [dmls]) must equal 1.')
-            if self.ro[i] < 0:
-                raise ValueError(f'At id: {id_}, ro: {self.ro[i]} (initial live below ground biomass at surface [in g/cm2]) must be greater than or equal to 0.')
-            if self.rd[i] <= 0:
-                raise ValueError(f'At id: {id_}, rd: {self.rd[i]} (maximum root depth [in cm]) must be greater than 0.')
-            if (self.du[i] - self.db[i]) < self.rd[i]:
-                raise ValueError(f'At id: {id_}, initial layer depth: {self.du[i] - self.db[i]} (du: {self.du[i]} - db: {self.db[i]}) must be greater than or equal to the maximum root depth: {self.rd[i]}.')
-            if self.k1[i] <= 0 or self.k1[i] >= 1:
-                raise ValueError(f'At id: {id_}, k1: {self.k1[i]} (distribution parameter for below ground biomass a function of depth [in 1/cm]) must be greater than 0 and less than 1.')
-            if self.k2[i] <= 0:
-                raise ValueError(f'At id: {id_}, k2: {self.k2[i]} (turnover rate of below ground biomass [in 1/yr]) must be greater than 0.')
-            if self.k3[i] < 0 or self.k3[i] > 1:
-                raise ValueError(f'At id: {id_}, k3: {self.k3[i]} (portion of plant matter that is inorganic ash [dmls]) must be greater than 0 and less than 1.')
-            if self.sv_to_ro[i] <= 0:
-                raise ValueError(f'At id: {id_}, sv_to_ro: {self.sv_to_ro[i]} (conversion factor for converting stem volume (from NBSDynamics) into live biomass concentration at sediment surface (ro) [dmls]) must be greater than 0.')
-            if self.wa_to_rl[i] <= 0:
-                raise ValueError(f'At id: {id_}, wa_to_rl: {self.wa_to_rl[i]} (ratio of above ground biomass production to below ground biomass [dmls]) must be greater than 0.')
-
-    @property
-    def depth(self) -> tuple[float, ...]:
-        '''
-        Depth of the soil layer [in cm].
-        '''
-        return tuple(du - db for du, db in zip(self.du, self.db))
-    @property
-    def fi(self) -> tuple[float, ...]:
-        '''
-        Fraction of sediment that is inorganic [dmls].
-        '''
-        return tuple(1 - fo for fo in self.fo)
-    @property
-    def fl(self) -> tuple[float, ...]:
-        '''
-        Fraction of sediment that is labile [dmls].
-        '''
-        return tuple(1 - fc for fc in self.fc)
+        duplicates = [id_ for id_, count in Counter(self.ids).items() if count > 1]
+        if duplicates:
+            raise ValueError(f'The ids: {duplicates} are not unique.')
+        ids = self.ids
+        sa, du, db, bo, bi, fo, k, fc, ro, rd, k1, k2, k3, sv_to_ro, wa_to_rl = (
+            np.asarray(var, dtype=np.float64) for var in (
+                self.surface_areas, self.du, self.db, self.bo, self.bi, self.fo, self.k, self.fc,
+                self.ro, self.rd, self.k1, self.k2, self.k3, self.sv_to_ro, self.wa_to_rl))
+        depth, fi, fl = du - db, 1 - fo, 1 - fc
+        object.__setattr__(self, 'depth', tuple(depth.tolist()))
+        object.__setattr__(self, 'fi', tuple(fi.tolist()))
+        object.__setattr__(self, 'fl', tuple(fl.tolist()))
+        # each check is a mask of invalid values and a message for the first invalid index.
+        checks = (
+            (sa <= 0, lambda i: f'At id: {ids[i]}, sa: {self.surface_areas[i]} (surface area [in cm2]) must be greater than 0.'),
+            (du <= db, lambda i: f'At id: {ids[i]}, du: {self.du[i]} (top elevation [in cm]) must be greater than db: {self.db[i]} (bottom elevation [in cm]).'),
+            (bo <= 0, lambda i: f'At id: {ids[i]}, bo: {self.bo[i]} (bulk density of organic matter [in g/cm3]) must be greater than 0.'),
+            (bi <= 0, lambda i: f'At id: {ids[i]}, bi: {self.bi[i]} (bulk density of inorganic matter [in g/cm3]) must be greater than 0.'),
+            ((fo < 0) | (fo > 1), lambda i: f'At id: {ids[i]}, fo: {self.fo[i]} (fraction of sediment that is organic [dmls]) must be greater than 0 and less than 1.'),
+            ((fi < 0) | (fi > 1), lambda i: f'At id: {ids[i]}, fi: {self.fi[i]} (fraction of sediment that is inorganic [dmls]) must be greater than 0 and less than 1.'),
+            (np.abs(fo + fi - 1) > 1e-12, lambda i: f'At id: {ids[i]}, fo: {self.fo[i]} (fraction of sediment that is organic [dmls]) plus fi: {self.fi[i]} (fraction of sediment that is inorganic [dmls]) must equal 1.'),
+            (k <= 0, lambda i: f'At id: {ids[i]}, k: {self.k[i]} (specific decay constant for labile organic material [in 1/yr]) must be greater than 0.'),
+            ((fc < 0) | (fc > 1), lambda i: f'At id: {ids[i]}, fc: {self.fc[i]} (fraction of sediment that is refractory [dmls]) must be greater than 0 and less than 1.'),
+            (np.abs(fc + fl - 1) > 1e-12, lambda i: f'At id: {ids[i]}, fc: {self.fc[i]} (fraction of sediment that is refractory [dmls]) plus fl: {self.fl[i]} (fraction of sediment that is labile [dmls]) must equal 1.'),
+            (ro < 0, lambda i: f'At id: {ids[i]}, ro: {self.ro[i]} (initial live below ground biomass at surface [in g/cm2]) must be greater than or equal to 0.'),
+            (rd <= 0, lambda i: f'At id: {ids[i]}, rd: {self.rd[i]} (maximum root depth [in cm]) must be greater than 0.'),
+            (depth < rd, lambda i: f'At id: {ids[i]}, initial layer depth: {self.du[i] - self.db[i]} (du: {self.du[i]} - db: {self.db[i]}) must be greater than or equal to the maximum root depth: {self.rd[i]}.'),
+            ((k1 <= 0) | (k1 >= 1), lambda i: f'At id: {ids[i]}, k1: {self.k1[i]} (distribution parameter for below ground biomass a function of depth [in 1/cm]) must be greater than 0 and less than 1.'),
+            (k2 <= 0, lambda i: f'At id: {ids[i]}, k2: {self.k2[i]} (turnover rate of below ground biomass [in 1/yr]) must be greater than 0.'),
+            ((k3 < 0) | (k3 > 1), lambda i: f'At id: {ids[i]}, k3: {self.k3[i]} (portion of plant matter that is inorganic ash [dmls]) must be greater than 0 and less than 1.'),
+            (sv_to_ro <= 0, lambda i: f'At id: {ids[i]}, sv_to_ro: {self.sv_to_ro[i]} (conversion factor for converting stem volume (from NBSDynamics) into live biomass concentration at sediment surface (ro) [dmls]) must be greater than 0.'),
+            (wa_to_rl <= 0, lambda i: f'At id: {ids[i]}, wa_to_rl: {self.wa_to_rl[i]} (ratio of above ground biomass production to below ground biomass [dmls]) must be greater than 0.'),
+        )
+        for invalid, message in checks:
+            if invalid.any():
+                raise ValueError(message(int(invalid.argmax())))
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Constants:
     '''
     Constants for a model grid cell.
@@ -195,6 +185,22 @@ class Constants:
         >1: net influx.
     '''
 
+    # conversion factors, computed in __post_init__
+    organic_g_to_cm: float = field(init=False, repr=False, compare=False)
+    '''Converts organic weight [in g] to length [in cm], 1/bo/sa [in cm/g].'''
+    inorganic_g_to_cm: float = field(init=False, repr=False, compare=False)
+    '''Converts inorganic weight [in g] to length [in cm], 1/bi/sa [in cm/g].'''
+    organic_cm_to_g: float = field(init=False, repr=False, compare=False)
+    '''Converts organic length [in cm] to weight [in g], sa*bo [in g/cm].'''
+    inorganic_cm_to_g: float = field(init=False, repr=False, compare=False)
+    '''Converts inorganic length [in cm] to weight [in g], sa*bi [in g/cm].'''
+
+    def __post_init__(self):
+        object.__setattr__(self, 'organic_g_to_cm', 1 / self.bo / self.sa)
+        object.__setattr__(self, 'inorganic_g_to_cm', 1 / self.bi / self.sa)
+        object.__setattr__(self, 'organic_cm_to_g', self.sa * self.bo)
+        object.__setattr__(self, 'inorganic_cm_to_g', self.sa * self.bi)
+
     @property
     def depth(self) -> float:
         '''
@@ -214,53 +220,49 @@ class Constants:
         '''
         return 1 - self.fc
     @property
-    def organic_g_to_cm3(self) -> Callable[[float], float]:
+    def organic_g_to_cm3(self) -> float:
         '''
         Returns 1/self.bo constant [in cm3/g] for g to cm3 conversion.
         '''
         return 1 / self.bo
     @property
-    def inorganic_g_to_cm3(self) -> Callable[[float], float]:
+    def inorganic_g_to_cm3(self) -> float:
         '''
         Returns 1/self.bi constant [in cm3/g] for g to cm3 conversion.
         '''
         return 1 / self.bi
-    @property
-    def organic_converter_g_to_cm(self) -> Callable[[float], float]:
+    def organic_converter_g_to_cm(self, g: float) -> float:
         '''
         Converts g to cm.
         
         Returns: 
-            Function takes weight [in g], computes: g * (cm3/g) * (1/cm2) returning a length in cm.
+            Length in cm, computes: g * (cm3/g) * (1/cm2) for a weight [in g].
         '''
-        return lambda g: g * self.organic_g_to_cm3 / self.sa
-    @property
-    def inorganic_converter_g_to_cm(self) -> Callable[[float], float]:
+        return g * self.organic_g_to_cm
+    def inorganic_converter_g_to_cm(self, g: float) -> float:
         '''
         Converts g to cm.
         
         Returns: 
-            Function takes weight [in g], computes: g * (cm3/ g) * (1/cm2) returning a length in cm.
+            Length in cm, computes: g * (cm3/g) * (1/cm2) for a weight [in g].
         '''
-        return lambda g: g * self.inorganic_g_to_cm3 / self.sa
-    @property
-    def organic_converter_cm_to_g(self) -> Callable[[float], float]:
+        return g * self.inorganic_g_to_cm
+    def organic_converter_cm_to_g(self, cm: float) -> float:
         '''
         Converts cm to g.
         
         Returns: 
-            Function takes length [in cm], computes: cm * (cm2) * (g/cm3) returning a weight in g.
+            Weight in g, computes: cm * (cm2) * (g/cm3) for a length [in cm].
         '''
-        return lambda cm: cm * self.sa * self.bo
-    @property
-    def inorganic_converter_cm_to_g(self) -> Callable[[float], float]:
+        return cm * self.organic_cm_to_g
+    def inorganic_converter_cm_to_g(self, cm: float) -> float:
         '''
         Converts cm to g.
         
         Returns: 
-            Function takes length [in cm], computes: cm * (cm2) * (g/cm3) returning a weight in g.
+            Weight in g, computes: cm * (cm2) * (g/cm3) for a length [in cm].
         '''
-        return lambda cm: cm * self.sa * self.bi
+        return cm * self.inorganic_cm_to_g
 
 def parse_ids(ids: list[any]) -> tuple[int, ...]:
     '''
@@ -270,9 +272,9 @@ def parse_ids(ids: list[any]) -> tuple[int, ...]:
         if len(ids) != 3:
             raise ValueError('Too many values after "...".')
         ids = tuple(range(ids[0], ids[2] + 1))
-    for id_ in ids:
-        if ids.count(id_) > 1:
-            raise ValueError(f'The id: {id_} is not unique.')
+    duplicates = [id_ for id_, count in Counter(ids).items() if count > 1]
+    if duplicates:
+        raise ValueError(f'The ids: {duplicates} are not unique.')
     return tuple(map(int, ids))
 
 def parse_var(var: list[any], n_ids: int) -> tuple[float, ...]:
@@ -282,7 +284,7 @@ def parse_var(var: list[any], n_ids: int) -> tuple[float, ...]:
     if var[1] == '...':
         if len(var) != 2:
             raise ValueError('Invalid value after "...".')
-        var = [var[0]] * n_ids
+        return (float(var[0]),) * n_ids
     if len(var) != n_ids:
         raise ValueError('The number of variable entries must match the number of ids.')
     return tuple(map(float, var))
@@ -290,63 +292,84 @@ def parse_var(var: list[any], n_ids: int) -> tuple[float, ...]:
 def import_file(path: str = MORRIS_CONSTANTS) -> tuple[Constants, ...]:
     '''
     Reads a constants.toml file and returns a tuple of constants.
+
+    Note: results are cached by path and file modification time,
+    the (immutable) constants are parsed once per version of a file.
+    '''
+    return _import_file(path, os.stat(path).st_mtime_ns)
+
+def import_default(path: str = MORRIS_CONSTANTS) -> Constants:
+    '''
+    Returns the constants for the first cell in a constants.toml file (cached, see import_file).
+    '''
+    return import_file(path)[0]
+
+def read_file(path: str = MORRIS_CONSTANTS) -> ImportFileConstants:
+    '''
+    Reads a constants.toml file and returns the validated constants for all cells,
+    each variable is a tuple with one value per cell (in the order of the ids).
+
+    Note: results are cached by path and file modification time.
+    '''
+    return _read_file(path, os.stat(path).st_mtime_ns)
+
+@lru_cache(maxsize=16)
+def _import_file(path: str, mtime_ns: int) -> tuple[Constants, ...]:
+    '''
+    Returns a tuple of constants for a version (modification time) of a constants.toml file.
+    '''
+    return _factory(_read_file(path, mtime_ns))
+
+@lru_cache(maxsize=16)
+def _read_file(path: str, mtime_ns: int) -> ImportFileConstants: # pylint: disable=unused-argument
+    '''
+    Parses a version (modification time) of a constants.toml file.
     '''
     with open(path, 'rb') as file:
         data = tomllib.load(file)
-        # sediment core properties
-        ids = parse_ids(data['core']['ids'])
-        n = len(ids)
-        surface_areas = parse_var(data['core']['surface_areas'],  n)
-
-        # initial layer properties
-        du = parse_var(data['layer']['du'], n)
-        db = parse_var(data['layer']['db'], n)
-        # stock properties
-        bo = parse_var(data['stocks']['bo'], n)
-        bi = parse_var(data['stocks']['bi'], n)
-        fo = parse_var(data['stocks']['fo'], n)
-        # refractory and labile content properties
-        k = parse_var(data['stocks']['k'], n)
-        fc = parse_var(data['stocks']['fc'], n)
-        # biomass properties
-        ro = parse_var(data['stocks']['ro'], n)
-        rd = parse_var(data['stocks']['rd'], n)
-        k1 = parse_var(data['stocks']['k1'], n)
-        k2 = parse_var(data['stocks']['k2'], n)
-        k3 = parse_var(data['stocks']['k3'], n)
-        # litter properties
-        sv_to_ro = parse_var(data['stocks']['sv_to_ro'], n)
-        wa_to_rl = parse_var(data['stocks']['wa_to_rl'], n)
-        b = parse_var(data['stocks']['b'], n)
-    file_constants = ImportFileConstants(
+    # sediment core properties
+    ids = parse_ids(data['core']['ids'])
+    n = len(ids)
+    surface_areas = parse_var(data['core']['surface_areas'],  n)
+
+    # initial layer properties
+    du = parse_var(data['layer']['du'], n)
+    db = parse_var(data['layer']['db'], n)
+    # stock properties
+    bo = parse_var(data['stocks']['bo'], n)
+    bi = parse_var(data['stocks']['bi'], n)
+    fo = parse_var(data['stocks']['fo'], n)
+    # refractory and labile content properties
+    k = parse_var(data['stocks']['k'], n)
+    fc = parse_var(data['stocks']['fc'], n)
+    # biomass properties
+    ro = parse_var(data['stocks']['ro'], n)
+    rd = parse_var(data['stocks']['rd'], n)
+    k1 = parse_var(data['stocks']['k1'], n)
+    k2 = parse_var(data['stocks']['k2'], n)
+    k3 = parse_var(data['stocks']['k3'], n)
+    # litter properties
+    sv_to_ro = parse_var(data['stocks']['sv_to_ro'], n)
+    wa_to_rl = parse_var(data['stocks']['wa_to_rl'], n)
+    b = parse_var(data['stocks']['b'], n)
+    return ImportFileConstants(
         ids, surface_areas,
         du, db,
         bo, bi, fo,
         k, fc,
         ro, rd, k1, k2, k3,
         sv_to_ro, wa_to_rl, b)
-    return tuple(_factory(file_constants, i) for i in range(n))
 
-def _factory(file_constants: ImportFileConstants, i: int) -> Constants:
+def _factory(file_constants: ImportFileConstants) -> tuple[Constants, ...]:
     '''
-    Returns a model grid cell's constants.
+    Returns each model grid cell's constants.
+
+    Note: constants are passed by keyword, so the order of the fields does not matter.
     '''
-    return Constants(
-        id=file_constants.ids[i],
-        sa=file_constants.surface_areas[i],
-        du=file_constants.du[i],
-        db=file_constants.db[i],
-        bo=file_constants.bo[i],
-        bi=file_constants.bi[i],
-        fo=file_constants.fo[i],
-        k=file_constants.k[i],
-        fc=file_constants.fc[i],
-        ro=file_constants.ro[i],
-        rd=file_constants.rd[i],
-        k1=file_constants.k1[i],
-        k2=file_constants.k2[i],
-        k3=file_constants.k3[i],
-        sv_to_ro=file_constants.sv_to_ro[i],
-        wa_to_rl=file_constants.wa_to_rl[i],
-        b=file_constants.b[i]
-    )
+    f = file_constants
+    return tuple(
+        Constants(id=id_, sa=sa, du=du, db=db, bo=bo, bi=bi, fo=fo, k=k, fc=fc,
+                  ro=ro, rd=rd, k1=k1, k2=k2, k3=k3, sv_to_ro=sv_to_ro, wa_to_rl=wa_to_rl, b=b)
+        for id_, sa, du, db, bo, bi, fo, k, fc, ro, rd, k1, k2, k3, sv_to_ro, wa_to_rl, b in zip(
+            f.ids, f.surface_areas, f.du, f.db, f.bo, f.bi, f.fo, f.k, f.fc,
+            f.ro, f.rd, f.k1, f.k2, f.k3, f.sv_to_ro, f.wa_to_rl, f.b))
@@ -21,24 +21,24 @@ class Log:
 
     def write(self, csv_path: str) -> None:
         '''Writes data to a csv file.'''
-        with open(csv_path, 'w', newline='', encoding='utf-8') as csv_file:
+        with open(csv_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csv_file:
             writer = csv.writer(csv_file)
             writer.writerow(self.headers)
-            for row in self.data:
-                if isinstance(row, (tuple, list)):
-                    writer.writerow(row)
-                else:
-                    writer.writerow((row,))
+            writer.writerows(self.data)
 
 def logger(f: Callable[..., tuple[float,...]]) -> Callable[..., tuple[float,...]]:
-    '''Decorator that wraps a function (i.e. cell.step_forward()) to log its output.'''
-    is_initialized: bool = False
+    '''
+    Decorator that wraps a function (i.e. cell.step_forward()) to log its output.
+
+    Note: logs are kept in (and looked up from) the REGISTRY by cell id, so a cell whose log
+    is removed from the REGISTRY starts a new log on its next call.
+    '''
     def wrapper(*args, **kwargs) -> tuple[float,...]:
         output = f(*args, **kwargs)
-        if not is_initialized:
-            log = Log()
-            log.headers = args[0].output_headers
-            REGISTRY[args[0].id] = log
-        log.data.append(output)
+        cell_id = args[0].id
+        log = REGISTRY.get(cell_id)
+        if log is None: # first call for this cell.
+            log = REGISTRY[cell_id] = Log(headers=args[0].output_headers)
+        log.data.append(output if isinstance(output, (tuple, list)) else (output,))
         return output
     return wrapper
@@ -3,10 +3,9 @@ Below ground biomass functions.
 '''
 import math
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import TypeAlias, Callable, Self
 
-import numpy as np
-
 from src.constants import Constants
 from src.stock import Tag, Measurement, conversion_builder
 from src.validators import non_negative_attribute, ascending_non_negative_attribute
@@ -27,20 +26,25 @@ def distribution_builder(constants: Constants) -> Callable[[float], F_Distributi
     k1 = constants.k1
     root_depth = constants.rd
     surface_area = constants.sa
+    @lru_cache(maxsize=64)
     def partial(top: float) -> Callable[[float], float]:
         '''
         Returns a fully parameterized biomass distribution function.
+        
+        Note: functions are cached on top, so they are reused across substeps (and cells).
         '''
-        non_negative_attribute('top', top)
+        if __debug__:
+            non_negative_attribute('top', top)
         def fx(depth: float) -> float:
             '''
             Returns:
                 float: biomass [in g] at a given depth [in cm].
             '''
-            non_negative_attribute('depth', depth)
+            if __debug__:
+                non_negative_attribute('depth', depth)
             if depth > root_depth:
                 return 0
-            return top * np.exp(-k1 * depth) * surface_area
+            return top * math.exp(-k1 * depth) * surface_area
         return fx
     return partial
 
@@ -49,17 +53,31 @@ def integration_builder(constants: Constants) -> Callable[[F_Distribution], F_In
     Returns a partially paramterized function for integrating the biomass distribution function.
     '''
     k1 = constants.k1
+    root_depth = constants.rd
     def partial(fx: F_Distribution) -> F_Integration:
         '''
         Returns a fully parameterized function for integrating the biomass distribution function.
+
+        Note: the distribution at the root depth is evaluated once (on first use), since every
+        layer that reaches below the root depth (and every burial) is integrated to it.
         '''
+        at_root_depth = None
         def integrate(depths: tuple[float, float]) -> float:
             '''
             Returns: 
                 float: integral of the biomass distribution function [in g] across depths [in cm].
+
+            Note: there is no biomass below the root depth, so depths are limited to the root depth.
             '''
-            ascending_non_negative_attribute('depths', depths)
-            return (fx(depths[1]) - fx(depths[0])) / -k1
+            if __debug__:
+                ascending_non_negative_attribute('depths', depths)
+            nonlocal at_root_depth
+            if depths[1] < root_depth:
+                return (fx(depths[1]) - fx(depths[0])) / -k1
+            if at_root_depth is None:
+                at_root_depth = fx(root_depth)
+            f0 = at_root_depth if depths[0] >= root_depth else fx(depths[0])
+            return (at_root_depth - f0) / -k1
         return integrate
     return partial
 
@@ -67,9 +85,8 @@ def turnover_builder(constants: Constants) -> Callable[[F_Integration], F_Turnov
     '''
     Returns partially parameterized biomass turnover function.
     '''
-    k2 = constants.k2
-    fc = constants.fc
-    fl = constants.fl
+    labile_rate = constants.k2 * constants.fl
+    refractory_rate = constants.k2 * constants.fc
     def turnover(weight: float, years: float) -> Turnover:
         '''
         Computes biomass [in g] removed due to turnover [in dmls/yr].
@@ -77,11 +94,13 @@ def turnover_builder(constants: Constants) -> Callable[[F_Integration], F_Turnov
         Returns:
             Tuple[float, float, float]: refractory, labile, inorganic [in g].
         '''
-        non_negative_attribute('years', years)
-        non_negative_attribute('weight', weight)
+        if __debug__:
+            non_negative_attribute('years', years)
+            non_negative_attribute('weight', weight)
+        weight_years = weight * years
         return (
-            weight * k2 * fl * years,
-            weight * k2 * fc * years,
+            labile_rate * weight_years,
+            refractory_rate * weight_years,
             0.0 # by assumption in Morris & Bowden (1986).
         )
     return turnover
@@ -90,9 +109,8 @@ def erosion_builder(constants: Constants) -> Callable[[F_Integration], F_Turnove
     '''
     Returns partially parameterized function removing biomass [in g] due to erosion [in cm].
     '''
-    fc = constants.fc
-    fl = constants.fl
-    k3 = constants.k3
+    labile, refractory = (1 - constants.k3) * constants.fl, (1 - constants.k3) * constants.fc
+    inorganic = constants.k3
     def partial(fx: F_Integration) -> F_Turnover:
         '''Returns fully parameterized function removing biomass [in g] due to erosion [in cm].'''
         def erosion(depths: tuple[float, float], erosion: float) -> Turnover:
@@ -106,11 +124,12 @@ def erosion_builder(constants: Constants) -> Callable[[F_Integration], F_Turnove
             Returns:
                 Tuple[float, float, float]: refractory, labile, inorganic [in g].
             '''
-            non_negative_attribute('erosion', erosion)
-            ascending_non_negative_attribute('depths', depths)
+            if __debug__:
+                non_negative_attribute('erosion', erosion)
+                ascending_non_negative_attribute('depths', depths)
             length = min(depths[1] - depths[0], erosion)
             mass = fx((depths[0], depths[0] + length))
-            return (mass * (1 - k3) * fl, mass * (1 - k3) * fc, mass * k3)
+            return (mass * labile, mass * refractory, mass * inorganic)
         return erosion
     return partial
 
@@ -118,7 +137,8 @@ def negative_growth_builder(constants: Constants) -> Callable[[float], Turnover]
     '''
     Returns partially parameterized function removing biomass [in g] due to negative growth [in g].
     '''
-    k3 = constants.k3
+    labile, refractory = (1 - constants.k3) * constants.fl, (1 - constants.k3) * constants.fc
+    inorganic = constants.k3
     def negative_growth(mass: float) -> Turnover:
         '''
         Computes biomass [in g] removed due to negative growth [in dmls/yr].
@@ -126,21 +146,15 @@ def negative_growth_builder(constants: Constants) -> Callable[[float], Turnover]
         Returns:
             Tuple[float, float, float]: refractory, labile, inorganic [in g].
         '''
-        organic, inorganic = mass * (1 - k3), mass * k3
-        return (
-            organic * constants.fl,
-            organic * constants.fc,
-            inorganic
-        )
+        return (mass * labile, mass * refractory, mass * inorganic)
     return negative_growth
 
 def burial_builder(constants: Constants) -> Callable[[F_Integration], F_Turnover]:
     '''
     Returns partially parameterized function removing biomass [in g] due to burial [in cm].
     '''
-    fc = constants.fc
-    fl = constants.fl
-    k3 = constants.k3
+    labile, refractory = (1 - constants.k3) * constants.fl, (1 - constants.k3) * constants.fc
+    inorganic = constants.k3
     root_depth = constants.rd
     def partial(fx: F_Integration) -> F_Turnover:
         '''Returns fully parameterized function removing biomass [in g] due to burial [in cm].'''
@@ -155,18 +169,17 @@ def burial_builder(constants: Constants) -> Callable[[F_Integration], F_Turnover
             Returns:
                 Tuple[float, float, float]: refractory, labile, inorganic [in g].
             '''
-            non_negative_attribute('deposition', deposition)
-            ascending_non_negative_attribute('depths', depths)
-            def is_in_live_zone(depth_delta: float = 0):
-                return depths[1] + depth_delta <= root_depth
-            if is_in_live_zone() and not is_in_live_zone(deposition):
+            if __debug__:
+                non_negative_attribute('deposition', deposition)
+                ascending_non_negative_attribute('depths', depths)
+            # layer bottom is in the live zone before but not after deposition.
+            if depths[1] <= root_depth < depths[1] + deposition:
                 removal_depth = max(root_depth - deposition, depths[0])
                 mass = fx((removal_depth, root_depth))
-                organic, inorganic = mass * (1 - k3), mass * k3
-                return (organic * fl, organic * fc, inorganic)
+                return (mass * labile, mass * refractory, mass * inorganic)
             else:
                 # layer complete in our out of live zone (before and after).
-                return (0, 0, 0)
+                return (0.0, 0.0, 0.0)
         return burial
     return partial
 
@@ -188,6 +201,8 @@ class PartialTools:
     Holds partially parameterized biomass functions (intended for use as immutable object).
     
     Should be built on construction.
+
+    Note: tools are cached on top, so layers with the same surface biomass share their tools.
     '''
     def __init__(self, constants: Constants):
         self.partial_burial = burial_builder(constants)
@@ -197,8 +212,9 @@ class PartialTools:
         self.negative_growth = negative_growth_builder(constants)
         self.turnover = turnover_builder(constants)
         self.converter = conversion_builder(constants)
+        self.make_tools = lru_cache(maxsize=64)(self.__make_tools)
 
-    def make_tools(self, top: float) -> Tools:
+    def __make_tools(self, top: float) -> Tools:
         '''
         Returns a fully parameterized biomass functions.
         '''
@@ -207,21 +223,9 @@ class PartialTools:
         return Tools(self.turnover, integrate,
                      self.partial_burial(integrate), self.partial_erosion(integrate),
                      self.negative_growth,
-                     self.converter, self.remake_tools_builder)
+                     self.converter, self.make_tools)
 
-    @property
-    def remake_tools_builder(self) -> Callable[[float], 'Tools']:
-        '''
-        Returns a function that returns a fully parameterized biomass functions.
-        '''
-        def remake_tools(top: float) -> 'Tools':
-            '''
-            Returns a fully parameterized biomass functions.
-            '''
-            return self.make_tools(top)
-        return remake_tools
-
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Biomass:
     '''Below ground biomass.'''
     val: float
@@ -243,7 +247,7 @@ class Biomass:
         return self.fxs.converter(self.val, self.tag, Measurement.WEIGHT)
 
     def transfers(self, deposition: float, depths: Depths,
-                  yrs: float) -> tuple[Turnover, Turnover, Turnover]:
+                  yrs: float) -> tuple[Turnover, float, float]:
         '''
         Computes turnover, burial, erosion [in g] of biomass over timeperiod [in yrs].
         
@@ -251,15 +255,27 @@ class Biomass:
         root death are equivalent" thus turnover is instantaneous replaced in equal quantities
         by new living biomass. Therefore turnover is not substracted from the biomass stock
         before accounting for burial or erosion. As a result turnover is a net gain for the cohert.
+
+        Returns:
+            tuple[Turnover, float, float]: turnover plus burial transfered to sediments
+                (labile, refractory, inorganic) [in g], total burial [in g], total erosion [in g].
+
+        Note: layers without biomass (e.g. below the root depth) have no transfers.
         '''
+        if self.val == 0:
+            return ((0.0, 0.0, 0.0), 0.0, 0.0)
+        fxs = self.fxs
+        labile, refractory, inorganic = fxs.turnover(self.weight, yrs)
         if deposition > 0:
-            return (self.fxs.turnover(self.weight, yrs),
-                    self.fxs.burial(depths, deposition),
-                    (0.0, 0.0 , 0.0)) # no losses from system.
-        else: # erosion
-            return (self.fxs.turnover(self.weight, yrs),
-                    (0.0, 0.0, 0.0), # no burial with erosion.
-                    self.fxs.erosion(depths, -deposition)) # loss from system
+            burial = fxs.burial(depths, deposition)
+            return ((labile + burial[0], refractory + burial[1], inorganic + burial[2]),
+                    burial[0] + burial[1] + burial[2],
+                    0.0) # no losses from system.
+        # erosion, no burial with erosion.
+        erosion = fxs.erosion(depths, -deposition)
+        return ((labile, refractory, inorganic),
+                0.0,
+                erosion[0] + erosion[1] + erosion[2]) # loss from system
 
     def remake(self, top: float, depth: float) -> Self:
         '''
@@ -276,6 +292,10 @@ class Biomass:
         '''Returns True if self and other are equal.'''
         return math.isclose(self.weight, other.weight, abs_tol=0.0001) and self.tag == other.tag
 
+    def __hash__(self) -> int:
+        '''Biomass hash, consistent with equality (weights are compared with a tolerance).'''
+        return hash(self.tag)
+
 def factory(top: float, depths: tuple[float, float], partial_tools: PartialTools) -> Biomass:
     '''
     Returns a biomass object.
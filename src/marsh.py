@@ -26,8 +26,9 @@ class Marsh:
             yrs (float): length of timestep [in yrs].
             substeps (float): number of substeps to take. 1 by default.
         '''
+        cells = self.cells
         for cell_id, (dep, top) in cell_inputs.items():
-            self.cells[cell_id].step_forward(dep, top, yrs, substeps)
+            cells[cell_id] = cells[cell_id].step_forward(dep, top, yrs, substeps)
 
 def initialize(input_file: str, output_directory: str) -> Marsh:
     '''Constructs a marsh from an input file.
@@ -1,7 +1,8 @@
 '''
 Labile, refractory and inorganic sediment functions.
 '''
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Callable, Self
 
 from src.constants import Constants
@@ -12,6 +13,7 @@ def decomposition_builder(constants: Constants) -> Callable[[float, float], floa
     '''
     Returns a function that send decomposed labile sediment [in g] out of the layer.
     '''
+    k = constants.k
     def decomposition(labile_weight: float, yrs: float) -> float:
         '''
         Decomposition of labile material [in g], this a loss from the system.
@@ -20,15 +22,17 @@ def decomposition_builder(constants: Constants) -> Callable[[float, float], floa
             [1] This is part of eq. 5: kCl(t) in Morris & Bowden.
             [2] Labile weight is in g not g/cm2 (as it is in Morris & Bowden).
         '''
-        non_negative_attribute('yrs', yrs)
-        non_negative_attribute('labile_weight', labile_weight)
-        return labile_weight * constants.k * yrs
+        if __debug__:
+            non_negative_attribute('yrs', yrs)
+            non_negative_attribute('labile_weight', labile_weight)
+        return labile_weight * k * yrs
     return decomposition
 
 def ash_uptake_builder(constants: Constants) -> Callable[[float], float]:
     '''
     Returns a function that send ash [in g] to above ground biomass production, out of the layer.
     '''
+    k3, wa_to_rl = constants.k3, constants.wa_to_rl
     def ash_uptake(biomass_weight: float, yrs: float) -> float:
         '''
         Ash uptake [in g], this a loss from the system.
@@ -37,15 +41,17 @@ def ash_uptake_builder(constants: Constants) -> Callable[[float], float]:
             [1] This is part of eq. 10: -k3(Wb)B/Rl in Morris & Bowden.
             [2] There are some inconsistencies with this equation in Morris & Bowden.
         '''
-        non_negative_attribute('yrs', yrs)
-        non_negative_attribute('biomass_weight', biomass_weight)
-        return constants.k3 * biomass_weight * constants.wa_to_rl * yrs
+        if __debug__:
+            non_negative_attribute('yrs', yrs)
+            non_negative_attribute('biomass_weight', biomass_weight)
+        return k3 * biomass_weight * wa_to_rl * yrs
     return ash_uptake
 
 def deposition_builder(constants: Constants) -> Callable[[float], tuple[float, float, float]]:
     '''
     Divides deposited sediment into labile, refractory and inorganic components.
     '''
+    fo, fl, fc, fi = constants.fo, constants.fl, constants.fc, constants.fi
     def deposition(weight: float) -> tuple[float, float, float]:
         '''
         Computes biomass [in g] deposited as sediment [in cm].
@@ -53,70 +59,96 @@ def deposition_builder(constants: Constants) -> Callable[[float], tuple[float, f
         Returns:
             Tuple[float, float, float]: labile, refractory, inorganic [in g].
         '''
-        non_negative_attribute('weight', weight)
-        return (weight * constants.fo * constants.fl,
-                weight * constants.fo * constants.fc,
-                weight * constants.fi)
+        if __debug__:
+            non_negative_attribute('weight', weight)
+        organic = weight * fo
+        return (organic * fl, organic * fc, weight * fi)
     return deposition
 
 class Tools:
     '''
     Holds fully parameterized sediment functions.
     '''
+    __slots__ = ('converter', 'ash_uptake', 'decomposition', 'deposition')
+
     def __init__(self, constants: Constants):
         self.converter = conversion_builder(constants)
         self.ash_uptake = ash_uptake_builder(constants)
         self.decomposition = decomposition_builder(constants)
         self.deposition = deposition_builder(constants)
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Sediment:
-    '''Sediment base class.'''
+    '''Sediment base class, weight is computed on construction and length on first use.'''
     val: float
     tag: Tag
     converter: Callable[[float, Tag, Measurement], float]
     measurement: Measurement
 
+    # weight [in g], computed in __post_init__
+    _weight: float = field(init=False, repr=False, compare=False)
+    # length [in cm], computed on first use
+    _length: float | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        weight = self.val
+        if self.measurement != Measurement.WEIGHT:
+            weight = self.converter(weight, self.tag, Measurement.WEIGHT)
+        object.__setattr__(self, '_weight', weight)
+
     @property
     def length(self) -> float:
         '''Returns the length [in cm] of the labile sediment.'''
-        if self.measurement == Measurement.LENGTH:
-            return self.val
-        return self.converter(self.val, self.tag, Measurement.LENGTH)
+        if self._length is None:
+            length = self.val
+            if self.measurement != Measurement.LENGTH:
+                length = self.converter(length, self.tag, Measurement.LENGTH)
+            object.__setattr__(self, '_length', length)
+        return self._length
     @property
     def weight(self) -> float:
         '''Returns the weight [in g] of the labile sediment.'''
-        if self.measurement == Measurement.WEIGHT:
-            return self.val
-        return self.converter(self.val, self.tag, Measurement.WEIGHT)
+        return self._weight
     def update(self, weight: float) -> Self:
         '''
         Add/substract sediment [in g] to stock, returning new sediment container.
         '''
+        if weight == 0:
+            return self
         return Sediment(self.weight + weight, self.tag, self.converter, Measurement.WEIGHT)
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Sediments:
-    '''Container for labile, refractory and inorganic sediment.'''
+    '''Container for labile, refractory and inorganic sediment, totals are cached.'''
     fxs: Tools
     labile: Sediment
     refractory: Sediment
     inorganic: Sediment
 
+    # total length [in cm] and weight [in g], computed on first use
+    _length: float | None = field(default=None, init=False, repr=False, compare=False)
+    _weight: float | None = field(default=None, init=False, repr=False, compare=False)
+
     @property
     def length(self) -> float:
         '''Returns the length [in cm] of the sediments.'''
-        return self.labile.length + self.refractory.length + self.inorganic.length
+        if self._length is None:
+            total = self.labile.length + self.refractory.length + self.inorganic.length
+            object.__setattr__(self, '_length', total)
+        return self._length
     @property
     def weight(self) -> float:
         '''Returns the weight [in g] of the sediments.'''
-        return self.labile.weight + self.refractory.weight + self.inorganic.weight
+        if self._weight is None:
+            total = self.labile.weight + self.refractory.weight + self.inorganic.weight
+            object.__setattr__(self, '_weight', total)
+        return self._weight
 
     def portions(self) -> tuple[float, float, float]:
         '''
         Computes portion labile, refractory and inorganic sediment.
         '''
-        total = self.labile.weight + self.refractory.weight + self.inorganic.weight
+        total = self.weight
         return (self.labile.weight / total,
                 self.refractory.weight / total,
                 self.inorganic.weight / total)
@@ -126,22 +158,28 @@ class Sediments:
         Transfers losses of sediment from system due to decomposition and ash uptake.
         '''
         return Sediments(self.fxs,
-                         self.labile.update(self.fxs.decomposition(self.labile.weight, yrs)),
+                         self.labile.update(-self.fxs.decomposition(self.labile.weight, yrs)),
                          self.refractory, # non-reactive no change expect by removal by erosion.
-                         self.inorganic.update(self.fxs.ash_uptake(self.inorganic.weight, yrs)))
+                         self.inorganic.update(-self.fxs.ash_uptake(self.inorganic.weight, yrs)))
 
-    def erosion(self, weight: float) -> Self:
+    def erosion(self, length: float) -> Self:
         '''
-        Adds or removes sediment [in g] to stocks, returning new sediment container.
-        Weight is negative for erosion. Positive weights (deposition) are ingnored.
+        Removes sediment [in cm] from stocks, returning new sediment container.
+
+        Each stock loses the same fraction of its weight, so the container length decreases by
+        length (or to zero). Non-positive lengths (deposition) are ignored.
         '''
-        if weight > 0: # erosion
-            # pylint: disable=line-too-long
-            labile, refractory, inorganic = tuple(portion * weight for portion in self.portions())
+        if length > 0: # erosion
+            remaining = max(1 - length / self.length, 0.0)
+            labile, refractory, inorganic = self.labile, self.refractory, self.inorganic
+            weight = Measurement.WEIGHT
             return Sediments(self.fxs,
-                             self.labile.update(self.fxs.converter(labile, Tag.LABILE, Measurement.WEIGHT)),
-                             self.refractory.update(self.fxs.converter(refractory, Tag.REFRACTORY, Measurement.WEIGHT)),
-                             self.inorganic.update(self.fxs.converter(inorganic, Tag.INORGANIC, Measurement.WEIGHT)))
+                             Sediment(labile.weight * remaining, Tag.LABILE,
+                                      labile.converter, weight),
+                             Sediment(refractory.weight * remaining, Tag.REFRACTORY,
+                                      refractory.converter, weight),
+                             Sediment(inorganic.weight * remaining, Tag.INORGANIC,
+                                      inorganic.converter, weight))
         return self # no deposition below top layer.
 
     def update(self, weights: tuple[float, float, float]) -> Self:
@@ -154,10 +192,53 @@ class Sediments:
         Returns:
             Sediments: updated sediment container.
         '''
+        labile, refractory, inorganic = self.labile, self.refractory, self.inorganic
+        weight = Measurement.WEIGHT
         return Sediments(self.fxs,
-                         self.labile.update(weights[0]),
-                         self.refractory.update(weights[1]),
-                         self.inorganic.update(weights[2]))
+                         Sediment(labile.weight + weights[0], Tag.LABILE, labile.converter, weight),
+                         Sediment(refractory.weight + weights[1], Tag.REFRACTORY,
+                                  refractory.converter, weight),
+                         Sediment(inorganic.weight + weights[2], Tag.INORGANIC,
+                                  inorganic.converter, weight))
+
+    def step(self, yrs: float, inflow: tuple[float, float, float], erosion: float,
+             deposition: tuple[float, float, float] | None = None) -> Self:
+        '''
+        Applies transfers, inflow, erosion and deposition, returning a new sediment container.
+
+        Same as self.transfers(yrs).update(inflow).erosion(erosion).update(deposition),
+        without building the intermediate containers.
+
+        Args:
+            yrs (float): length of timestep [in yrs].
+            inflow (tuple[float, float, float]): labile, refractory, inorganic [in g] inflows.
+            erosion (float): eroded sediment [in cm], ignored if not positive (see erosion).
+            deposition (tuple[float, float, float] | None): labile, refractory, inorganic [in g]
+                deposition, None for no deposition.
+        '''
+        fxs, weight = self.fxs, Measurement.WEIGHT
+        labile = self.labile.weight
+        labile = labile - fxs.decomposition(labile, yrs) + inflow[0]
+        refractory = self.refractory.weight + inflow[1]
+        inorganic = self.inorganic.weight
+        inorganic = inorganic - fxs.ash_uptake(inorganic, yrs) + inflow[2]
+        if erosion > 0:
+            length = Measurement.LENGTH
+            total = (fxs.converter(labile, Tag.LABILE, length)
+                     + fxs.converter(refractory, Tag.REFRACTORY, length)
+                     + fxs.converter(inorganic, Tag.INORGANIC, length))
+            remaining = max(1 - erosion / total, 0.0)
+            labile *= remaining
+            refractory *= remaining
+            inorganic *= remaining
+        if deposition is not None:
+            labile += deposition[0]
+            refractory += deposition[1]
+            inorganic += deposition[2]
+        return Sediments(fxs,
+                         Sediment(labile, Tag.LABILE, self.labile.converter, weight),
+                         Sediment(refractory, Tag.REFRACTORY, self.refractory.converter, weight),
+                         Sediment(inorganic, Tag.INORGANIC, self.inorganic.converter, weight))
 
     def __eq__(self, other: Self) -> bool:
         '''Sediments equality.'''
@@ -165,9 +246,17 @@ class Sediments:
                 self.refractory.weight == other.refractory.weight and
                 self.inorganic.weight == other.inorganic.weight)
 
+    def __hash__(self) -> int:
+        '''Sediments hash, consistent with equality (on weights).'''
+        return hash((self.labile.weight, self.refractory.weight, self.inorganic.weight))
+
+@lru_cache(maxsize=64)
 def factory(sum_of_stocks: float, tools: Tools, measurement: Measurement = Measurement.LENGTH) -> Sediments: # pylint: disable=line-too-long
     '''
     Returns labile, refractory and inorganic sediment stocks.
+
+    Note: sediments are immutable, so stocks built from the same inputs (e.g. the deposition
+    that starts each new top layer) are shared.
     '''
     labile, refractory, inorganic = tools.deposition(sum_of_stocks)
     # tools = Tools(constants)
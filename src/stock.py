@@ -1,20 +1,20 @@
 '''
 Protocols for stock variables.
 '''
-from enum import Enum
+from enum import IntEnum
 from dataclasses import dataclass
 from typing import Protocol, Callable, Self
 
 from src.constants import Constants
 
-class Tag(Enum):
+class Tag(IntEnum):
     '''Stock type tag.'''
     BIOMASS = 0
     LABILE = 1
     REFRACTORY = 2
     INORGANIC = 3
 
-class Measurement(Enum):
+class Measurement(IntEnum):
     '''Type of measurement tag for stock values.'''
     LENGTH = 0
     WEIGHT = 1
@@ -36,7 +36,7 @@ class Stock(Protocol):
     def update(self, weight: float) -> Self:
         '''Updates stock by adding or subtracting weight [in g], returning new stock container.'''
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Inactive:
     '''Inactive stock variables.'''
     val: float
@@ -76,19 +76,15 @@ def factory(constants: Constants) -> tuple[Inactive, Inactive, Inactive]:
 
 def conversion_builder(constants: Constants) -> Callable[[float, Tag, Measurement], float]:
     '''Returns a functon that converts between length [in cm] and weight [in g] values.'''
+    organic_g_to_cm, inorganic_g_to_cm = constants.organic_g_to_cm, constants.inorganic_g_to_cm
+    organic_cm_to_g, inorganic_cm_to_g = constants.organic_cm_to_g, constants.inorganic_cm_to_g
     def converter(val: float, tag: Tag, output: Measurement) -> float:
         '''
         Returns biomass value as a length [in cm] or weight [in g].
         '''
-        match output:
-            case Measurement.LENGTH:
-                if tag == Tag.INORGANIC:
-                    return constants.inorganic_converter_g_to_cm(val)
-                return constants.organic_converter_g_to_cm(val)
-            case Measurement.WEIGHT:
-                if tag == Tag.INORGANIC:
-                    return constants.inorganic_converter_cm_to_g(val)
-                return constants.organic_converter_cm_to_g(val)
-            case _:
-                raise ValueError(f'Invalid measurement type: {output}')
+        if output == Measurement.LENGTH:
+            return val * (inorganic_g_to_cm if tag == Tag.INORGANIC else organic_g_to_cm)
+        if output == Measurement.WEIGHT:
+            return val * (inorganic_cm_to_g if tag == Tag.INORGANIC else organic_cm_to_g)
+        raise ValueError(f'Invalid measurement type: {output}')
     return converter
@@ -5,11 +5,14 @@ from typing import Any, Callable
 
 def non_negative_attribute(key: str, value: float|int) -> None:
     '''Validates attribute is non-negative.'''
-    if isinstance(value, (float, int)) and not isinstance(value, bool) and value < 0:
+    # bools are ints but never negative, so they need no separate check.
+    if isinstance(value, (float, int)) and value < 0:
         raise ValueError(f'{key} must be non-negative.')
 
 def non_negative(fx: Callable[...,Any]) -> Callable[...,Any]:  # pylint: disable=invalid-name
-    '''Decorator that validates non-negative inputs.'''
+    '''Decorator that validates non-negative inputs (returns fx unchanged with python -O).'''
+    if not __debug__:
+        return fx
     def validator(**kwargs) -> Any:
         for key, value in kwargs.items():
             non_negative_attribute(key=key, value=value)
@@ -2,12 +2,18 @@
 Unit tests for cell.py module.
 '''
 import unittest
+from dataclasses import replace
 
 import numpy as np
 
-from src.constants import import_file
+from src.constants import import_default
 from src.live import PartialTools
-from src.cell import enumerate_backwards, initial_layer, Layer, factory, Cell
+from src.stock import Tag, Measurement
+import src.live as bio
+import src.sediment as sed
+from src.cell import enumerate_backwards, initial_layer, cell_tools, Layer, factory, Cell
+
+test_constants = import_default()
 
 class TestEnumerateBackwards(unittest.TestCase):
     '''Tests the enumerate_backwards function.'''
@@ -21,31 +27,31 @@ class TestInitialLayer(unittest.TestCase):
     # pylint: disable=line-too-long
     def test_initial_layer_depth(self):
         '''Tests the initial_layer with morris constants has depth of 30cm.'''
-        self.assertEqual(initial_layer(import_file()[0]).depth, 30)
+        self.assertEqual(initial_layer(test_constants).depth, 30)
     def test_initial_layer_has_expected_number_of_stocks(self):
         '''Tests the initial_layer with morris constants has expected number of stocks.'''
-        self.assertEqual(len(initial_layer(import_file()[0]).stocks), 2)
+        self.assertEqual(len(initial_layer(test_constants).stocks), 2)
     def test_initial_layer_length_of_stocks_is_30_cm(self):
         '''Tests the initial_layer with morris constants has expected length of stocks.'''
-        init = initial_layer(import_file()[0])
+        init = initial_layer(test_constants)
         lengths = np.sum([stock.length for stock in init.stocks])
         self.assertEqual(lengths, 30)
     def test_initial_layer_morris_constant_biomass_is_approx_0_10_g(self):
         '''Exposes morris constant biomass weight is ~ 0.10 g in 30cm (root zone).'''
-        self.assertAlmostEqual(initial_layer(import_file()[0]).stocks[0].weight, 0.10, 2)
+        self.assertAlmostEqual(initial_layer(test_constants).stocks[0].weight, 0.10, 2)
     def test_initial_layer_morris_constant_biomass_is_approx_1_39_cm(self):
         '''Exposes morris constant biomass length is ~ 1.39 cm in 30cm (root zone).'''
-        exp = import_file()[0].organic_converter_g_to_cm(0.10)
-        self.assertAlmostEqual(initial_layer(import_file()[0]).stocks[0].length, exp, 2)
+        exp = test_constants.organic_converter_g_to_cm(0.10)
+        self.assertAlmostEqual(initial_layer(test_constants).stocks[0].length, exp, 2)
     def test_initial_layer_morris_constant_sediments_is_approx_28_61_cm(self):
         '''Exposes morris constant sediments length, 28.61 cm, in 30cm (root zone - biomass length).'''
-        self.assertAlmostEqual(initial_layer(import_file()[0]).stocks[1].length, 28.61, 2)
+        self.assertAlmostEqual(initial_layer(test_constants).stocks[1].length, 28.61, 2)
     def test_initial_layer_morris_constant_sediments_is_approx_2_19_g(self):
         '''Exposes morris constant sediments weight, is approx 2.19 g in 30cm ().'''
-        self.assertAlmostEqual(initial_layer(import_file()[0]).stocks[1].weight, 2.19, 2)
+        self.assertAlmostEqual(initial_layer(test_constants).stocks[1].weight, 2.19, 2)
     def test_initial_layer_biomass_stock_has_expected_weight(self):
         '''Tests the initial_layer with morris constants has expected biomass weight.'''
-        c = import_file()[0]
+        c = test_constants
         exp = PartialTools(c).make_tools(c.ro).integration((0, c.depth)) # ~ 0.10
         self.assertAlmostEqual(initial_layer(c).stocks[0].weight, exp, 2)
 
@@ -53,59 +59,139 @@ class TestLayer(unittest.TestCase):
     '''Tests the Layer class.'''
     def test_layer_depth(self):
         '''Tests the layer depth.'''
-        self.assertEqual(Layer((0, 10), (0, 0)).depth, 10)
+        self.assertEqual(Layer(0, 10, 0, 0).depth, 10)
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_step_forward_raises_value_error_if_yrs_is_negative(self):
         '''Tests the step_forward function raises error if yrs is negative.'''
-        layer = Layer((0, 1), (0, 0))
+        layer = Layer(0, 1, 0, 0)
         with self.assertRaises(ValueError):
             layer.step_forward(0, 0, -1)
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_step_forward_raises_value_error_if_biomass_is_negative(self):
         '''Tests the step_forward function raises error if deposition is negative.'''
-        layer = Layer((0, 1), (0, 0))
+        layer = Layer(0, 1, 0, 0)
         with self.assertRaises(ValueError):
             layer.step_forward(0, -1, 0)
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_step_forward_raises_value_error_if_erosion_gt_depth(self):
         '''Tests the step_forward function raises error if deposition is negative.'''
-        layer = Layer((0, 1), (0, 0))
+        layer = Layer(0, 1, 0, 0)
         with self.assertRaises(ValueError):
             layer.step_forward(-1.1, 0, 0)
+    def test_layer_is_not_hashable(self):
+        '''Tests the (mutable) layer is not hashable.'''
+        with self.assertRaises(TypeError):
+            hash(initial_layer(test_constants))
     def test_step_forward_yrs_0_returns_layer_with_no_change(self):
         '''
         Tests the step_forward function returns a layer with no change 
         if yrs is 0, dep is 0 and biomass is no change.
         '''
-        cons = import_file()[0]
+        cons = test_constants
         init_layer = initial_layer(cons)
         self.assertEqual(init_layer.step_forward(0, cons.ro, 0), init_layer)
     def test_step_forward_erosion_eq_depth_returns_empty_layer(self):
         '''Tests the step_forward function returns an empty layer if erosion equals depth.'''
-        init_layer = initial_layer(import_file()[0])
+        init_layer = initial_layer(test_constants)
         self.assertEqual(init_layer.step_forward(-init_layer.depth, 0, 0).depth, 0)
+    def test_step_forward_erosion_removes_eroded_depth(self):
+        '''Tests the step_forward function removes the eroded depth from the layer.'''
+        init_layer = initial_layer(test_constants)
+        actual = init_layer.step_forward(-1, 0, 0)
+        self.assertAlmostEqual(actual.depth, init_layer.depth - 1)
+    def test_step_forward_erosion_moves_top_down_to_fixed_bottom(self):
+        '''Tests the step_forward function moves the top down by the eroded depth.'''
+        init_layer = initial_layer(test_constants)
+        actual = init_layer.step_forward(-1, test_constants.ro, 0)
+        self.assertAlmostEqual(actual.top, init_layer.top + 1)
+        self.assertEqual(actual.bottom, init_layer.bottom)
+    def test_step_forward_eroded_biomass_is_not_eroded_from_sediments(self):
+        '''Tests the step_forward function erodes sediment less the eroded biomass length.'''
+        init_layer = initial_layer(test_constants)
+        actual = init_layer.step_forward(-1, test_constants.ro, 0)
+        fxs = init_layer.biomass.fxs
+        eroded_biomass = fxs.converter(sum(fxs.erosion(init_layer.depths, 1)),
+                                       Tag.BIOMASS, Measurement.LENGTH)
+        self.assertGreater(eroded_biomass, 0)
+        self.assertAlmostEqual(init_layer.sediments.length - actual.sediments.length,
+                               1 - eroded_biomass)
+    def test_step_forward_growth_moves_bottom_down_from_top_at_0(self):
+        '''Tests the step_forward function adds sediment gains to a layer with its top at 0.'''
+        partial_tools, sed_tools = cell_tools(test_constants)
+        layer = Layer(0, 1, bio.factory(test_constants.ro, (0, 1), partial_tools),
+                      sed.factory(0.0, sed_tools))
+        actual = layer.step_forward(0, test_constants.ro, 1)
+        self.assertEqual(actual.top, 0)
+        self.assertGreater(actual.depth, layer.depth)
+        self.assertAlmostEqual(actual.depth - layer.depth,
+                               actual.sediments.length - layer.sediments.length)
+    def test_step_forward_deposition_on_top_layer_keeps_top_at_0(self):
+        '''Tests the step_forward function adds deposition to the top layer below a top at 0.'''
+        layer = factory(test_constants).top_layer(0.25, test_constants.ro)
+        actual = layer.step_forward(0.25, test_constants.ro, 0.01, True)
+        self.assertEqual(actual.top, 0)
+        self.assertGreater(actual.depth, layer.depth)
+    def test_step_forward_deposition_on_top_layer_adds_deposited_length(self):
+        '''Tests the step_forward function adds the deposited length [in cm] to the top layer.'''
+        layer = factory(test_constants).top_layer(0.25, test_constants.ro)
+        actual = layer.step_forward(0.25, test_constants.ro, 0, True)
+        self.assertAlmostEqual(actual.sediments.length - layer.sediments.length, 0.25)
+        self.assertAlmostEqual(actual.depth, 0.5)
 
 class TestFactory(unittest.TestCase):
     '''Tests the factory function.'''
     def test_factory(self):
         '''Tests the factory function returns a Cell.'''
-        self.assertIsInstance(factory(import_file()[0]), Cell)
+        self.assertIsInstance(factory(test_constants), Cell)
     def test_factory_creates_cell_w_single_bottom_layer(self):
         '''Tests the factory function returns a Cell with expected number of layers.'''
-        self.assertEqual(len(factory(import_file()[0]).layers), 1)
+        self.assertEqual(len(factory(test_constants).layers), 1)
     def test_factory_creates_cell_with_elevation_defined_in_import_file(self):
         '''Tests the factory function returns a Cell with expected elevation.'''
-        self.assertEqual(factory(import_file()[0]).elevation, import_file()[0].du)
+        self.assertEqual(factory(test_constants).elevation, test_constants.du)
+
+    def test_factory_cells_with_same_constants_share_tools(self):
+        '''Tests the factory function returns cells sharing tools if constants only differ by id.'''
+        cons = test_constants
+        self.assertIs(factory(cons).tools, factory(replace(cons, id=cons.id + 1)).tools)
 
 class TestCell(unittest.TestCase):
     '''Tests the Cell class.'''
     def test_step_forward_raises_value_error_if_yrs_is_negative(self):
         '''Tests the step_forward function raises error if yrs is negative.'''
         with self.assertRaises(ValueError):
-            factory(import_file()[0]).step_forward(0, 0, -1)
+            factory(test_constants).step_forward(0, 0, -1)
     def test_step_forward_raises_value_error_if_top_is_negative(self):
         '''Tests the step_forward function raises error if biomass at top is negative.'''
         with self.assertRaises(ValueError):
-            factory(import_file()[0]).step_forward(0, -1, 1)
+            factory(test_constants).step_forward(0, -1, 1)
     def test_step_forward_0_deposition_adds_new_empty_layer(self):
         '''Tests the step_forward function adds a new empty layer if deposition is 0.'''
-        cell = factory(import_file()[0])
+        cell = factory(test_constants)
         cell.step_forward(0, 0, 0)
         self.assertEqual(len(cell.layers), 2)
+    def test_step_forward_deposition_w_sub_steps_adds_deposition_to_top_layer(self):
+        '''Tests the step_forward function deposits on the new top layer after the first substep.'''
+        cell = factory(test_constants)
+        for _ in range(2):
+            cell.step_forward(0.5, test_constants.ro, 1.0, 2)
+        self.assertEqual(len(cell.layers), 3)
+        self.assertTrue(all(layer.top >= 0 for layer in cell.layers))
+        self.assertGreater(cell.layers[-1].depth, 0.25)
+        self.assertLess(cell.layers[-1].depth, 0.5)
+    def test_depth_of_layer_is_sum_of_depths_of_preceding_layers(self):
+        '''Tests the depth_of_layer function sums the depths of the layers before index.'''
+        cell = factory(test_constants)
+        cell.step_forward(0, 0, 0)
+        self.assertEqual(cell.depth_of_layer(0), 0)
+        self.assertAlmostEqual(cell.depth_of_layer(1), cell.layers[0].depth)
+        with self.assertRaises(IndexError):
+            cell.depth_of_layer(2)
+    def test_depth_of_layer_is_updated_if_layers_change(self):
+        '''Tests the depth_of_layer function reflects layers appended or replaced in place.'''
+        cell = factory(test_constants)
+        cell.depth_of_layer(0)
+        cell.layers.append(cell.top_layer(1.0, 0))
+        self.assertEqual(cell.depth_of_layer(1), cell.layers[0].depth)
+        cell.layers[0] = cell.top_layer(2.0, 0)
+        self.assertEqual(cell.depth_of_layer(1), 2.0)
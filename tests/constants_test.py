@@ -2,9 +2,13 @@
 Tests for the constants module.
 '''
 import unittest
+from dataclasses import fields
 from pathlib import Path
 
-from src.constants import MORRIS_CONSTANTS, import_file, parse_ids, parse_var, Constants
+from src.constants import (MORRIS_CONSTANTS, import_file, import_default, read_file, parse_ids,
+                           parse_var, Constants, ImportFileConstants)
+
+test_constants = import_default()
 
 class TestMorrisConstants(unittest.TestCase):
     '''Tests the path of the default constants file.'''
@@ -23,26 +27,15 @@ class TestParseIds(unittest.TestCase):
         '''Tests the parse_ids function with a list.'''
         ids = [1, 2, 3]
         self.assertEqual(parse_ids(ids), tuple(ids))
-    def test_non_integer_with_elipse(self):
-        '''Tests the parse_ids function with a non-integer.'''
-        ids = [1, '...', 'a']
-        with self.assertRaises(TypeError):
-            parse_ids(ids)
-    def test_too_many_values_after_elipse(self):
-        '''Tests the parse_ids function with too many values after an elipse.'''
-        ids = [1, '...', 2, 3]
-        with self.assertRaises(ValueError):
-            parse_ids(ids)
-    def test_non_integer_without_elipse(self):
-        '''Tests the parse_ids function with a non-integer.'''
-        ids = [1, 'a', 3]
-        with self.assertRaises(ValueError):
-            parse_ids(ids)
-    def test_duplicate_ids_raise_value_error(self):
-        '''Tests the parse_ids function with duplicate ids.'''
-        ids = [1, 1, 3]
-        with self.assertRaises(ValueError):
-            parse_ids(ids)
+    def test_invalid_ids_raise_errors(self):
+        '''Tests the parse_ids function with invalid ids.'''
+        cases = (([1, '...', 'a'], TypeError),  # non-integer with elipse.
+                 ([1, '...', 2, 3], ValueError), # too many values after elipse.
+                 ([1, 'a', 3], ValueError),      # non-integer without elipse.
+                 ([1, 1, 3], ValueError))        # duplicate ids.
+        for ids, error in cases:
+            with self.subTest(ids=ids), self.assertRaises(error):
+                parse_ids(ids)
 
 class TestParseSurfaceAreas(unittest.TestCase):
     '''Tests the parse_surface_areas function.'''
@@ -54,16 +47,13 @@ class TestParseSurfaceAreas(unittest.TestCase):
         '''Tests the parse_surface_areas function with a list.'''
         surface_areas = [1, 2, 3]
         self.assertEqual(parse_var(surface_areas, 3), tuple(surface_areas))
-    def test_too_many_values_after_elipse(self):
-        '''Tests the parse_surface_areas function with too many values after an elipse.'''
-        surface_areas = [1, '...', 2, 3]
-        with self.assertRaises(ValueError):
-            parse_var(surface_areas, 10)
-    def test_invalid_number_of_surface_areas(self):
-        '''Tests the parse_surface_areas function with an invalid number of surface areas.'''
-        surface_areas = [1, 2, 3]
-        with self.assertRaises(ValueError):
-            parse_var(surface_areas, 10)
+    def test_invalid_surface_areas_raise_value_error(self):
+        '''Tests the parse_surface_areas function with invalid surface areas.'''
+        cases = ([1, '...', 2, 3], # too many values after elipse.
+                 [1, 2, 3])        # invalid number of surface areas.
+        for surface_areas in cases:
+            with self.subTest(surface_areas=surface_areas), self.assertRaises(ValueError):
+                parse_var(surface_areas, 10)
 
 class TestImportFile(unittest.TestCase):
     '''Tests the import file function.'''
@@ -71,28 +61,28 @@ class TestImportFile(unittest.TestCase):
         '''Tests the import file returns constants.'''
         data = import_file(MORRIS_CONSTANTS)
         self.assertIsInstance(data[0], Constants)
+    def test_import_default_is_first_imported_constants(self):
+        '''Tests the import default returns the constants for the first id.'''
+        self.assertIs(import_default(MORRIS_CONSTANTS), import_file(MORRIS_CONSTANTS)[0])
+    def test_read_file_has_a_value_per_id(self):
+        '''Tests the read file returns a value per id (for each constants in import file).'''
+        data = read_file(MORRIS_CONSTANTS)
+        self.assertIsInstance(data, ImportFileConstants)
+        self.assertEqual(data.ids, tuple(c.id for c in import_file(MORRIS_CONSTANTS)))
+        self.assertEqual(len(data.ro), len(data.ids))
 
 class TestConstants(unittest.TestCase):
     '''Tests the Constants class.'''
     def test_default_attributes_initialized(self):
         '''Tests that the default objects attributes are initialized with appropriate types.'''
-        is_ok:bool = True
-        test_obj = import_file()[0]
-        for k, val in test_obj.__dict__.items():
-            if k.startswith('__') or str(val).startswith('<function'):
-                continue
-            else:
-                if k == 'id':
-                    if not isinstance(val, int):
-                        is_ok = False
-                else:
-                    if not isinstance(val, float):
-                        is_ok = False
-        self.assertTrue(is_ok)
+        for f in fields(test_constants):
+            with self.subTest(attribute=f.name):
+                expected = int if f.name == 'id' else float
+                self.assertIsInstance(getattr(test_constants, f.name), expected)
 
     def test_organic_converter_g_to_cm(self):
         '''Test g to cm3 converter is callable.'''
-        self.assertTrue(callable(import_file()[0].organic_converter_g_to_cm))
+        self.assertTrue(callable(test_constants.organic_converter_g_to_cm))
 
     def test_inorganic_converter_g_to_cm_1g_is_10cm(self):
         '''
@@ -103,7 +93,7 @@ class TestConstants(unittest.TestCase):
         1 cm3 is 1/1,000,000 (less than a teaspoon) of a cubic meter.
         So, 1 g of inorganic material in a 1 cm2 surface would be 10 cm deep.
         '''
-        self.assertEqual(import_file()[0].inorganic_converter_g_to_cm(1), 10)
+        self.assertEqual(test_constants.inorganic_converter_g_to_cm(1), 10)
 
     def test_organic_converter_g_to_cm_0d1g_is_1d392cm(self):
         '''
@@ -113,10 +103,10 @@ class TestConstants(unittest.TestCase):
         Equivalently there are 13.92 cm3 per 1 g of organic material.
         So, 0.1 g of inorganic material in a 1 cm2 grid would be 1.392 cm deep.
         '''
-        self.assertAlmostEqual(import_file()[0].organic_converter_g_to_cm(0.1), 1.392, 3)
+        self.assertAlmostEqual(test_constants.organic_converter_g_to_cm(0.1), 1.392, 3)
 
     def test_describe_cm3_to_g_conversion(self):
         '''
         1 kg of organic material takes up approximatly 13.923 liters (>3.5 gallons) of space.
         '''
-        self.assertAlmostEqual(import_file()[0].organic_g_to_cm3 * 1000, 13923, -1)
+        self.assertAlmostEqual(test_constants.organic_g_to_cm3 * 1000, 13923, -1)
@@ -0,0 +1,60 @@
+'''
+Tests for the data module.
+'''
+import csv
+import os
+import tempfile
+import unittest
+
+from src.data import logger, REGISTRY
+
+class LoggedCell:
+    '''Minimal cell with a logged step_forward.'''
+    output_headers = ('x',)
+    def __init__(self, id_: int):
+        self.id = id_
+    @logger
+    def step_forward(self, x: float) -> tuple[float]:
+        '''Returns the input as a row.'''
+        return (x,)
+
+class LoggedScalarCell(LoggedCell):
+    '''Minimal cell with a logged step_forward returning a scalar.'''
+    @logger
+    def step_forward(self, x: float) -> float:
+        '''Returns the input.'''
+        return x
+
+class TestLogger(unittest.TestCase):
+    '''Tests the logger decorator.'''
+    def test_logger_keeps_log_across_calls(self):
+        '''Tests the logger appends every output to a single log per cell.'''
+        self.addCleanup(REGISTRY.pop, -1, None)
+        self.addCleanup(REGISTRY.pop, -2, None)
+        a, b = LoggedCell(-1), LoggedCell(-2)
+        a.step_forward(1.0)
+        a.step_forward(2.0)
+        b.step_forward(3.0)
+        self.assertEqual(REGISTRY[-1].data, [(1.0,), (2.0,)])
+        self.assertEqual(REGISTRY[-2].data, [(3.0,)])
+        self.assertEqual(REGISTRY[-1].headers, ('x',))
+    def test_logger_starts_new_log_if_removed_from_registry(self):
+        '''Tests the logger starts a new log for a cell whose log was removed from the registry.'''
+        self.addCleanup(REGISTRY.pop, -1, None)
+        cell = LoggedCell(-1)
+        cell.step_forward(1.0)
+        REGISTRY.pop(-1)
+        cell.step_forward(2.0)
+        self.assertEqual(REGISTRY[-1].data, [(2.0,)])
+    def test_logger_writes_scalar_outputs_as_rows(self):
+        '''Tests the log of a scalar output is written as one value per row.'''
+        self.addCleanup(REGISTRY.pop, -3, None)
+        cell = LoggedScalarCell(-3)
+        cell.step_forward(1.0)
+        cell.step_forward(2.0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'log.csv')
+            REGISTRY[-3].write(path)
+            with open(path, newline='', encoding='utf-8') as csv_file:
+                rows = list(csv.reader(csv_file))
+        self.assertEqual(rows, [['x'], ['1.0'], ['2.0']])
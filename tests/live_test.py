@@ -3,12 +3,16 @@ Tests the live.py module.
 '''
 import unittest
 
-from src.constants import import_file
+from src.constants import import_default
 from src.live import (distribution_builder, integration_builder,
                       turnover_builder, erosion_builder, burial_builder,
                       PartialTools, Tools, Biomass, factory)
 
-test_constants = import_file()[0]
+test_constants = import_default()
+
+def integration_fx(top: float = 1.0):
+    '''Returns the integration function for the test constants and biomass at the surface.'''
+    return integration_builder(test_constants)(distribution_builder(test_constants)(top))
 
 class TestDistributionBuilder(unittest.TestCase):
     '''
@@ -31,6 +35,7 @@ class TestPartialDistribution(unittest.TestCase):
         Tests the distribution_builder function returns a function.
         '''
         self.assertTrue(callable(distribution_builder(test_constants)(1.0)))
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_partial_distribution_top_less_than_0_raises_value_error(self):
         '''
         Depth less than 0 raises ValueError.
@@ -38,6 +43,13 @@ class TestPartialDistribution(unittest.TestCase):
         f = distribution_builder(test_constants)
         with self.assertRaises(ValueError):
             f(-1.0)
+    def test_partial_distribution_same_top_reuses_distribution(self):
+        '''
+        Unchanged top returns the same distribution function.
+        '''
+        f = distribution_builder(test_constants)
+        self.assertIs(f(1.0), f(1.0))
+        self.assertIsNot(f(1.0), f(2.0))
 
 class TestDistribution(unittest.TestCase):
     '''
@@ -51,6 +63,7 @@ class TestDistribution(unittest.TestCase):
         '''
         dist = distribution_builder(test_constants)(1.0)
         self.assertTrue(isinstance(dist(1.0), float))
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_distribution_depth_less_than_0_raises_value_error(self):
         '''
         Depth less than 0 raises ValueError.
@@ -125,44 +138,43 @@ class TestIntegration(unittest.TestCase):
     
     A closure that is returned by the integration_builder->partial_integration function.
     '''
+    @classmethod
+    def setUpClass(cls):
+        cls.integration = staticmethod(integration_fx())
     def test_integration_returns_float(self):
         '''
         Tests the integration function returns a float.
         '''
-        dist = distribution_builder(test_constants)(1.0)
-        f = integration_builder(test_constants)(dist)
+        f = self.integration
         self.assertTrue(isinstance(f((0,1)), float))
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_integration_depths_less_than_0_raises_value_error(self):
         '''
         Depth less than 0 raises ValueError.
         '''
-        dist = distribution_builder(test_constants)(1.0)
-        f = integration_builder(test_constants)(dist)
+        f = self.integration
         with self.assertRaises(ValueError):
             f((0, -1.0))
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_integration_ascending_depths_raises_value_error(self):
         '''
         Ascending depths raises ValueError.
         '''
-        dist = distribution_builder(test_constants)(1.0)
-        f = integration_builder(test_constants)(dist)
+        f = self.integration
         with self.assertRaises(ValueError):
             f((1.0, 0))
     def test_integration_depths_equal_to_0_returns_0(self):
         '''
         Depths equal to 0 returns 0.
         '''
-        dist = distribution_builder(test_constants)(1.0)
-        f = integration_builder(test_constants)(dist)
+        f = self.integration
         self.assertAlmostEqual(f((0, 0)), 0.0)
 
     def test_integration_first_increment_between_0_and_top(self):
         '''
         First increment of integration is between 0 and top.
         '''
-        top = 1.0
-        dist = distribution_builder(test_constants)(top)
-        val = integration_builder(test_constants)(dist)((0.0, 1.0))
+        val = self.integration((0.0, 1.0))
         self.assertLess(val, 1.0)
         self.assertGreater(val, 0.0)
 
@@ -173,11 +185,18 @@ class TestIntegration(unittest.TestCase):
         Each unit of biomass as surface given Morris default
         parameters for k, and rd produces ~9.5 g of biomass per cm2 cell.
         '''
-        top = 1.0
-        dist = distribution_builder(test_constants)(top)
-        val = integration_builder(test_constants)(dist)((0.0, test_constants.rd))
+        val = self.integration((0.0, test_constants.rd))
         self.assertAlmostEqual(val, 9.50, 2)
 
+    def test_integration_below_rd_is_limited_to_rd(self):
+        '''
+        Integration below the root depth equals integration to the root depth.
+        '''
+        f = self.integration
+        rd = test_constants.rd
+        self.assertAlmostEqual(f((0.0, rd + 10.0)), f((0.0, rd)))
+        self.assertAlmostEqual(f((rd + 1.0, rd + 10.0)), 0.0)
+
 class TestTurnoverBuilder(unittest.TestCase):
     '''
     Tests the turnover_builder function.
@@ -198,6 +217,7 @@ class TestTurnover(unittest.TestCase):
         '''
         turnover = turnover_builder(test_constants)
         self.assertTrue(isinstance(turnover(weight=1.0, years=1.0), tuple))
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_turnover_negative_weight_raises_value_error(self):
         '''
         Negative weight raises ValueError.
@@ -205,6 +225,7 @@ class TestTurnover(unittest.TestCase):
         turnover = turnover_builder(test_constants)
         with self.assertRaises(ValueError):
             turnover(weight=-1.0, years=1.0)
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_turnover_negative_years_raises_value_error(self):
         '''
         Negative years raises ValueError.
@@ -258,36 +279,39 @@ class TestPartialErosion(unittest.TestCase):
         self.assertTrue(callable(erosion_builder(test_constants)(lambda x: x)))
     def test_partial_erosion_returns_callable_w_integration_fx(self):
         '''Tests the erosion_builder function returns a function.'''
-        self.assertTrue(callable(erosion_builder(test_constants)(integration_builder(test_constants)(distribution_builder(test_constants)(1.0))))) # pylint: disable=line-too-long
+        self.assertTrue(callable(erosion_builder(test_constants)(integration_fx())))
 
 class TestErosion(unittest.TestCase):
     '''Tests the erosion function.'''
+    @classmethod
+    def setUpClass(cls):
+        cls.integration = staticmethod(integration_fx())
+        cls.erosion = staticmethod(erosion_builder(test_constants)(cls.integration))
     # pylint: disable=line-too-long
     # TODO: Test erodable_depth
     def test_erosion_returns_tuple(self):
         '''Tests the erosion function returns a tuple.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        erosion = erosion_builder(test_constants)(integration)
+        erosion = self.erosion
         self.assertTrue(isinstance(erosion((0, 1), 1), tuple))
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_erosion_negative_depth_raises_value_error(self):
         '''Tests the erosion function raises ValueError with negative depth.'''
-        erosion = erosion_builder(test_constants)(integration_builder(test_constants)(distribution_builder(test_constants)(1.0)))
+        erosion = self.erosion
         with self.assertRaises(ValueError):
             erosion((-1.0, 1), 1.0)
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_erosion_negative_weight_raises_value_error(self):
         '''Tests the erosion function raises ValueError with negative weight.'''
-        erosion = erosion_builder(test_constants)(integration_builder(test_constants)(distribution_builder(test_constants)(1.0)))
+        erosion = self.erosion
         with self.assertRaises(ValueError):
             erosion((0, 1), -1.0)
     def test_erosion_output_sums_to_biomass_increment_of_depth(self):
         '''Tests the erosion function output sums to biomass weight in eroded depth.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        erosion = erosion_builder(test_constants)(integration)
+        integration, erosion = self.integration, self.erosion
         self.assertAlmostEqual(sum(erosion((0, 1), erosion=1.0)), integration((0, 1)), 4)
     def test_erosion_output_sums_to_biomass_in_depth(self):
         '''Tests the erosion function output sums to biomass weight in eroded depth.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        erosion = erosion_builder(test_constants)(integration)
+        integration, erosion = self.integration, self.erosion
         self.assertAlmostEqual(sum(erosion((0, 11), erosion=10)), integration((0, 10)), 4)
 
 class TestBurialBuilder(unittest.TestCase):
@@ -307,64 +331,63 @@ class TestPartialBurial(unittest.TestCase):
         self.assertTrue(callable(burial_builder(test_constants)(lambda x: x)))
     def test_partial_burial_returns_callable_w_integration_fx(self):
         '''Tests the burial_builder function returns a function.'''
-        self.assertTrue(callable(burial_builder(test_constants)(integration_builder(test_constants)(distribution_builder(test_constants)(1.0))))) # pylint: disable=line-too-long
+        self.assertTrue(callable(burial_builder(test_constants)(integration_fx())))
 
 class TestBurial(unittest.TestCase):
     '''Tests the burial function.'''
+    @classmethod
+    def setUpClass(cls):
+        cls.integration = staticmethod(integration_fx())
+        cls.burial = staticmethod(burial_builder(test_constants)(cls.integration))
     def test_burial_returns_tuple(self):
         '''Tests the burial function returns a tuple.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        burial = burial_builder(test_constants)(integration)
+        burial = self.burial
         self.assertTrue(isinstance(burial((0, 1), 1), tuple))
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_burial_negative_depth_raises_value_error(self):
         '''Tests the burial function raises ValueError with negative depth.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        burial = burial_builder(test_constants)(integration)
+        burial = self.burial
         with self.assertRaises(ValueError):
             burial((-1.0, 1), 1.0)
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_burial_descending_depth_raises_value_error(self):
         '''Tests the burial function raises ValueError with descending depth.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        burial = burial_builder(test_constants)(integration)
+        burial = self.burial
         with self.assertRaises(ValueError):
             burial((1, 0), 1.0)
+    @unittest.skipIf(not __debug__, 'input checks are skipped with python -O')
     def test_burial_negative_deposition_raises_value_error(self):
         '''Tests the burial function raises ValueError with negative deposition.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        burial = burial_builder(test_constants)(integration)
+        burial = self.burial
         with self.assertRaises(ValueError):
             burial((0, 1), -1.0)
     def test_burial_output_sums_to_biomass_increment_of_depth(self):
         '''Tests the burial function output sums to biomass weight in deposited depth.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        expected = integration((test_constants.rd - 1, test_constants.rd))
-        burial = burial_builder(test_constants)(integration)
-        actual = burial((test_constants.rd - 1, test_constants.rd), deposition=1.0)
+        integration, burial, rd = self.integration, self.burial, test_constants.rd
+        expected = integration((rd - 1, rd))
+        actual = burial((rd - 1, rd), deposition=1.0)
         self.assertAlmostEqual(sum(actual), expected, 4)
     def test_burial_output_sums_to_biomass_at_bottom_depth(self):
         '''Tests the burial function output sums to biomass weight in deposited depth.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        expected = integration((test_constants.rd - 2, test_constants.rd))
-        burial = burial_builder(test_constants)(integration)
-        actual = burial((test_constants.rd - 2, test_constants.rd), deposition=2.0)
+        integration, burial, rd = self.integration, self.burial, test_constants.rd
+        expected = integration((rd - 2, rd))
+        actual = burial((rd - 2, rd), deposition=2.0)
         self.assertAlmostEqual(sum(actual), expected, 4)
     def test_burial_output_sums_to_biomass_at_bottom_for_deposition_excceeds_depth_case(self):
         '''Tests the burial function output sums to biomass weight in deposited depth.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        expected = integration((test_constants.rd - 1, test_constants.rd))
-        burial = burial_builder(test_constants)(integration)
-        actual = burial((test_constants.rd - 1, test_constants.rd), deposition=2.0)
+        integration, burial, rd = self.integration, self.burial, test_constants.rd
+        expected = integration((rd - 1, rd))
+        actual = burial((rd - 1, rd), deposition=2.0)
         self.assertAlmostEqual(sum(actual), expected, 4)
     def test_burial_below_live_zone_at_start_returns_zeros(self):
         '''Tests the burial function returns zeros below live zone at start.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        burial = burial_builder(test_constants)(integration)
-        actual = burial((test_constants.rd, test_constants.rd + 1), deposition=1.0)
+        burial = self.burial
+        rd = test_constants.rd
+        actual = burial((rd, rd + 1), deposition=1.0)
         self.assertEqual(actual, (0, 0, 0))
     def test_burial_wholey_in_live_zone_returns_zeros(self):
         '''Tests the burial function returns zeros wholly in live zone.'''
-        integration = integration_builder(test_constants)(distribution_builder(test_constants)(1.0))
-        burial = burial_builder(test_constants)(integration)
+        burial = self.burial
         actual = burial((0, test_constants.rd-1), deposition=1.0)
         self.assertEqual(actual, (0, 0, 0))
 
@@ -375,3 +398,29 @@ class TestFactory(unittest.TestCase):
         biomass = factory(1.0, (0, 1), PartialTools(test_constants))
         self.assertEqual(biomass.val, PartialTools(test_constants).make_tools(1).integration((0,1)))
 
+    def test_factory_biomass_with_same_top_share_tools(self):
+        '''Tests biomass built with the same top reuses the same tools.'''
+        partial_tools = PartialTools(test_constants)
+        a = factory(1.0, (0, 1), partial_tools)
+        b = factory(1.0, (1, 2), partial_tools)
+        self.assertIs(a.fxs, b.fxs)
+    def test_factory_biomass_equal_within_tolerance_have_equal_hashes(self):
+        '''Tests biomass with weights equal within the tolerance are equal and hash equal.'''
+        a = factory(1.0, (0, 1), PartialTools(test_constants))
+        b = Biomass(a.val + 1e-6, a.fxs)
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+
+class TestTransfers(unittest.TestCase):
+    '''Tests the biomass transfers.'''
+    def test_transfers_with_erosion_has_no_burial(self):
+        '''Tests transfers with erosion returns turnover as inflow and no burial.'''
+        biomass = factory(1.0, (0, 1), PartialTools(test_constants))
+        inflow, buried, _ = biomass.transfers(-0.5, (0, 1), 1.0)
+        self.assertEqual(inflow, turnover_builder(test_constants)(biomass.weight, 1.0))
+        self.assertEqual(buried, 0.0)
+    def test_transfers_below_rd_returns_zeros(self):
+        '''Tests transfers of biomass below the root depth returns zeros.'''
+        depths = (test_constants.rd, test_constants.rd + 1)
+        biomass = factory(1.0, depths, PartialTools(test_constants))
+        self.assertEqual(biomass.transfers(1.0, depths, 1.0), ((0, 0, 0), 0, 0))
@@ -0,0 +1,34 @@
+'''
+Tests for the sediment module.
+'''
+import unittest
+
+from src.constants import import_default
+from src.sediment import Tools, factory
+
+test_constants = import_default()
+
+class TestErosion(unittest.TestCase):
+    '''Tests the removal of eroded sediment [in cm] from the sediment stocks.'''
+    @classmethod
+    def setUpClass(cls):
+        cls.sediments = factory(10.0, Tools(test_constants))
+    def test_erosion_removes_eroded_length(self):
+        '''Tests erosion reduces the sediments length by the eroded length.'''
+        self.assertAlmostEqual(self.sediments.erosion(4.0).length, 6.0)
+    def test_erosion_keeps_portions(self):
+        '''Tests erosion removes the same fraction of each stock.'''
+        expected = self.sediments.portions()
+        for actual, exp in zip(self.sediments.erosion(4.0).portions(), expected):
+            self.assertAlmostEqual(actual, exp)
+    def test_erosion_gt_length_removes_all_sediments(self):
+        '''Tests erosion of more than the sediments length leaves no sediment.'''
+        self.assertEqual(self.sediments.erosion(20.0).length, 0)
+    def test_erosion_non_positive_returns_same_sediments(self):
+        '''Tests erosion ignores non-positive lengths (deposition).'''
+        self.assertIs(self.sediments.erosion(0.0), self.sediments)
+        self.assertIs(self.sediments.erosion(-1.0), self.sediments)
+    def test_step_erosion_eq_erosion(self):
+        '''Tests step without transfers removes the same sediment as erosion.'''
+        self.assertEqual(self.sediments.step(0, (0.0, 0.0, 0.0), 4.0),
+                         self.sediments.erosion(4.0))